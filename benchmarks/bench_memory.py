@@ -0,0 +1,59 @@
+import tracemalloc
+from typing import Callable
+
+from src.Players import Player
+from src.Wanna_play_kazik import Chip
+from src.We_need_one_more_goose import Goose, WarGoose, HonkGoose, GooseFlock
+
+
+def bytes_per_entity(factory: Callable[[int], object], count: int = 100_000) -> float:
+    """
+    Измеряет средний объём памяти на один объект через tracemalloc
+
+    Аргументы:
+    factory - функция, создающая объект по номеру
+    count - количество создаваемых объектов
+
+    Возвращает:
+    среднее количество байт на объект
+    """
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return used / count
+
+
+def with_dict(cls: type) -> type:
+    """
+    Возвращает подкласс с обычным __dict__ (представление "до" перехода на __slots__)
+
+    Аргументы:
+    cls - класс со слотами
+    """
+    return type(f'Dict{cls.__name__}', (cls,), {})
+
+
+def main() -> None:
+    """
+    Печатает таблицу: байт на объект с __dict__ и со __slots__
+    """
+    entities = {
+        'Player': (Player, lambda cls, i: cls(f'p{i}', 100)),
+        'Goose': (Goose, lambda cls, i: cls(f'g{i}', 5)),
+        'WarGoose': (WarGoose, lambda cls, i: cls(f'w{i}', 5, 10)),
+        'HonkGoose': (HonkGoose, lambda cls, i: cls(f'h{i}', 5, 7)),
+        'Chip': (Chip, lambda cls, i: cls(i)),
+        'GooseFlock': (GooseFlock, lambda cls, i: cls([])),
+    }
+    print(f'{"класс":<12}{"__dict__":>12}{"__slots__":>12}')
+    for name, (cls, make) in entities.items():
+        dict_cls = with_dict(cls)
+        before = bytes_per_entity(lambda i: make(dict_cls, i))
+        after = bytes_per_entity(lambda i: make(cls, i))
+        print(f'{name:<12}{before:>12.1f}{after:>12.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple, TypedDict
+
+from src import simulation
+from src.Players import Player, PlayerCollection
+from src.Wanna_play_kazik import Casino, CasinoBalance
+
+
+PLAYER_COUNTS = (4, 1_000, 100_000)
+DEFAULT_THRESHOLD = 0.1
+
+
+class Measurement(TypedDict):
+    """
+    Результат одного замера
+
+    Атрибуты:
+    value - значение
+    unit - единица измерения
+    higher_is_better - лучше ли большее значение
+    """
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+def build_casino(players: int, seed: int = 0) -> Casino:
+    """
+    Создаёт казино с заданным количеством игроков и стандартным набором гусей
+    (см. src.simulation.build_casino)
+
+    Аргументы:
+    players - количество игроков
+    seed - сид генератора казино
+
+    Возвращает:
+    казино для замеров
+    """
+    return simulation.build_casino(random.Random(seed),
+                                   (Player(f'Игрок {i}', 100 + i % 200) for i in range(players)))
+
+
+def best_rate(func: Callable[[int], object], number: int, repeat: int) -> float:
+    """
+    Измеряет скорость операции: лучший из repeat прогонов по number вызовов
+
+    Аргументы:
+    func - функция, выполняющая переданное ей количество операций
+    number - количество операций в одном прогоне
+    repeat - количество прогонов
+
+    Возвращает:
+    операций в секунду
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(number)
+        best = min(best, time.perf_counter() - start)
+    return number / best if best > 0 else float('inf')
+
+
+def bench_events(number: int, repeat: int) -> Dict[str, float]:
+    """
+    Пропускная способность каждого события казино (вызовов в секунду)
+    """
+    results = {}
+    for name in Casino.EVENT_WEIGHTS:
+        casino = build_casino(4)
+        event = getattr(casino, name)
+
+        def run(n: int, event=event) -> None:
+            for _ in range(n):
+                event()
+
+        results[f'event.{name}'] = best_rate(run, number, repeat)
+    return results
+
+
+def bench_hot_paths(number: int, repeat: int) -> Dict[str, float]:
+    """
+    Скорость CasinoBalance.__setitem__ и PlayerCollection.get_players_with_balance
+    """
+    balance = CasinoBalance()
+    names = [f'Игрок {i}' for i in range(64)]
+
+    def set_balances(n: int) -> None:
+        for i in range(n):
+            balance[names[i & 63]] = i
+
+    players = PlayerCollection([Player(f'Игрок {i}', i % 3) for i in range(1_000)])
+
+    def solvent(n: int) -> None:
+        for _ in range(n):
+            players.get_players_with_balance()
+
+    return {
+        'balance.setitem': best_rate(set_balances, number, repeat),
+        'players.get_players_with_balance[1k]': best_rate(solvent, max(1, number // 100), repeat),
+    }
+
+
+def bench_steps(number: int, repeat: int) -> Dict[str, float]:
+    """
+    Шагов казино в секунду при 4, 1k и 100k игроков
+    (для больших казино шагов меньше: часть событий проходит по всем игрокам)
+    """
+    results = {}
+    for count in PLAYER_COUNTS:
+        casino = build_casino(count)
+        steps = max(200, number * 1_000 // max(count, 1_000))
+        results[f'steps[{count}]'] = best_rate(casino.step_many, steps, repeat)
+    return results
+
+
+def bench_memory(number: int) -> Dict[str, float]:
+    """
+    Прирост памяти на шаг казино (байт, через tracemalloc)
+    """
+    casino = build_casino(4)
+    casino.step_many(100)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(number):
+        casino.step()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {'memory.bytes_per_step': used / number}
+
+
+def run_all(quick: bool = False) -> Dict[str, Measurement]:
+    """
+    Выполняет все замеры
+
+    Аргументы:
+    quick - уменьшенное количество повторов (для быстрой проверки)
+
+    Возвращает:
+    словарь имя замера -> {value, unit, higher_is_better}
+    """
+    number, repeat = (2_000, 3) if quick else (20_000, 5)
+    results: Dict[str, Measurement] = {}
+    for name, value in {**bench_events(number, repeat), **bench_hot_paths(number, repeat),
+                        **bench_steps(number, repeat)}.items():
+        results[name] = {'value': value, 'unit': 'ops/s', 'higher_is_better': True}
+    for name, value in bench_memory(number).items():
+        results[name] = {'value': value, 'unit': 'bytes', 'higher_is_better': False}
+    return results
+
+
+def compare(baseline: Dict[str, Measurement], current: Dict[str, Measurement],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Сравнивает замеры с базовыми
+
+    Аргументы:
+    baseline - базовые замеры
+    current - новые замеры
+    threshold - допустимое ухудшение в долях (по умолчанию 0.1 = 10%)
+
+    Возвращает:
+    список (имя, базовое значение, новое значение, изменение в долях, регрессия ли)
+    для всех базовых замеров. Изменение положительно, если стало лучше.
+    Замер, которого нет в новом наборе, считается регрессией (новое значение и изменение - nan)
+    """
+    rows = []
+    for name, base in baseline.items():
+        old_value = base['value']
+        if name not in current:
+            rows.append((name, old_value, float('nan'), float('nan'), True))
+            continue
+        new_value = current[name]['value']
+        if old_value == 0:
+            change = 0.0
+        elif base.get('higher_is_better', True):
+            change = new_value / old_value - 1
+        else:
+            change = 1 - new_value / old_value
+        rows.append((name, old_value, new_value, change, change < -threshold))
+    return rows
+
+
+def load(path: str) -> Dict[str, Measurement]:
+    """
+    Читает замеры из JSON-файла, сохранённого командой run
+
+    Аргументы:
+    path - путь к файлу
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def main(argv: List[str] | None = None) -> int:
+    """
+    Точка входа:
+    python -m benchmarks.bench_speed run [-o baseline.json] [--quick]
+    python -m benchmarks.bench_speed compare baseline.json current.json [--threshold 0.1]
+
+    Возвращает:
+    код выхода (1, если найдена регрессия)
+    """
+    parser = argparse.ArgumentParser(description='Замеры скорости казино')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='выполнить замеры')
+    run_parser.add_argument('-o', '--output', help='сохранить результаты в JSON')
+    run_parser.add_argument('--quick', action='store_true', help='меньше повторов')
+    compare_parser = commands.add_parser('compare', help='сравнить два файла замеров')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_all(args.quick)
+        for name, result in results.items():
+            print(f'{name:<40}{result["value"]:>16.1f} {result["unit"]}')
+        if args.output:
+            data = {'python': sys.version.split()[0], 'platform': platform.platform(), 'results': results}
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        return 0
+
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    for name, old_value, new_value, change, regressed in rows:
+        if math.isnan(new_value):
+            mark = '  НЕТ ЗАМЕРА'
+        else:
+            mark = '  РЕГРЕССИЯ' if regressed else ''
+        print(f'{name:<40}{old_value:>14.1f}{new_value:>14.1f}{change:>+9.1%}{mark}')
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,10 @@
-from typing import Optional, Union, List, MutableSequence, Iterator
+import heapq
+import operator
+import random
+import weakref
+from array import array
+from itertools import compress
+from typing import Optional, Union, List, Dict, Iterable, MutableSequence, Iterator
 
 
 class Player:
@@ -9,9 +15,13 @@ class Player:
 
     Атрибуты:
     name - имя игрока
-    balance - баланс игрока
+    balance - баланс игрока (при переходе через ноль оповещает коллекции игрока)
+    _watchers - слабые ссылки на коллекции, в которых состоит игрок
+    (ссылка сама удаляется из списка, когда коллекция уничтожена)
     """
 
+    __slots__ = ('name', '_balance', '_watchers')
+
     def __init__(self, name: str, start_balance: int = 100):
         """
         инициализация игрока
@@ -21,7 +31,33 @@ class Player:
         start_balance - стартовый капитал (поля чудес)(по умолчанию 100)
         """
         self.name = name
-        self.balance = start_balance
+        self._balance = start_balance
+        self._watchers: Optional[List[weakref.ref]] = None
+
+    @property
+    def balance(self) -> int:
+        """
+        Возвращает:
+        текущий баланс игрока
+        """
+        return self._balance
+
+    @balance.setter
+    def balance(self, value: int) -> None:
+        """
+        Устанавливает баланс. Если игрок стал платёжеспособным или разорился,
+        сообщает об этом коллекциям, в которых он состоит
+
+        Аргументы:
+        value - новый баланс
+        """
+        was_solvent = self._balance > 0
+        self._balance = value
+        if self._watchers is not None and was_solvent != (value > 0):
+            for ref in list(self._watchers):
+                collection = ref()
+                if collection is not None:
+                    collection._solvency_changed(self, value > 0)
 
     def bet(self, amount: int) -> bool:
         """
@@ -60,9 +96,23 @@ class Player:
 class PlayerCollection(MutableSequence):
     """
     коллекция игроков с дополнительным функционалом.
+    Поддерживает индекс по именам для поиска за O(1).
+    Если в коллекции несколько игроков с одним именем, find_by_name возвращает
+    того, кто был добавлен раньше остальных
+
+    Также отслеживает игроков с положительным балансом: при переходе баланса через ноль
+    игрок сам сообщает об этом коллекции, поэтому случайный выбор платёжеспособного
+    игрока стоит O(1)
 
     Атрибуты:
     _players - список игроков
+    _by_name - словарь имя -> список игроков с этим именем (в порядке добавления)
+    _solvent - игроки с положительным балансом (порядок зависит от истории балансов:
+    удаление - обменом с последним), наружу отдаётся только через случайный выбор
+    и solvent_order (чтобы снимки и копии выбирали так же, как исходная коллекция)
+    _solvent_pos - словарь игрок -> позиция в _solvent
+    _positions - словарь id(игрока) -> позиция в _players для swap_remove
+    (None - не построен, строится заново после вставок в середину и удалений по индексу)
     """
 
     def __init__(self, players: Optional[List[Player]] = None):
@@ -73,6 +123,82 @@ class PlayerCollection(MutableSequence):
         players - список игроков. По умолчанию пустой
         """
         self._players = players if players is not None else []
+        self._by_name: Dict[str, List[Player]] = {}
+        self._solvent: List[Player] = []
+        self._solvent_pos: Dict[Player, int] = {}
+        self._positions: Optional[Dict[int, int]] = None
+        for player in self._players:
+            self._index_add(player)
+
+    def _index_add(self, player: Player) -> None:
+        """
+        Добавляет игрока в индекс по именам и начинает следить за его балансом
+
+        Аргументы:
+        player - добавляемый игрок
+        """
+        bucket = self._by_name.get(player.name)
+        if bucket is None:
+            self._by_name[player.name] = [player]
+        else:
+            if any(item is player for item in bucket):
+                bucket.append(player)
+                return
+            bucket.append(player)
+        if isinstance(player, Player):
+            if player._watchers is None:
+                player._watchers = []
+            watchers = player._watchers
+
+            def forget(ref: weakref.ref) -> None:
+                """
+                Удаляет ссылку на уничтоженную коллекцию из списка наблюдателей игрока
+                """
+                if ref in watchers:
+                    watchers.remove(ref)
+
+            watchers.append(weakref.ref(self, forget))
+            self._solvency_changed(player, player.balance > 0)
+
+    def _index_remove(self, player: Player) -> None:
+        """
+        Удаляет игрока из индекса по именам
+
+        Аргументы:
+        player - удаляемый игрок
+        """
+        bucket = self._by_name[player.name]
+        for i, item in enumerate(bucket):
+            if item is player:
+                del bucket[i]
+                break
+        if not bucket:
+            del self._by_name[player.name]
+        elif any(item is player for item in bucket):
+            return
+        if isinstance(player, Player):
+            if player._watchers is not None:
+                player._watchers[:] = [ref for ref in player._watchers if ref() is not self]
+            self._solvency_changed(player, False)
+
+    def _solvency_changed(self, player: Player, solvent: bool) -> None:
+        """
+        Обновляет множество платёжеспособных игроков (удаление - обменом с последним)
+
+        Аргументы:
+        player - игрок, у которого изменился баланс
+        solvent - True если баланс стал положительным
+        """
+        if solvent:
+            if player not in self._solvent_pos:
+                self._solvent_pos[player] = len(self._solvent)
+                self._solvent.append(player)
+        elif player in self._solvent_pos:
+            pos = self._solvent_pos.pop(player)
+            last = self._solvent.pop()
+            if last is not player:
+                self._solvent[pos] = last
+                self._solvent_pos[last] = pos
 
     def __len__(self) -> int:
         """
@@ -95,24 +221,40 @@ class PlayerCollection(MutableSequence):
             return PlayerCollection(self._players[index])
         return self._players[index]
 
-    def __setitem__(self, index: int, player: Player) -> None:
+    def __setitem__(self, index: Union[int, slice], player: Union[Player, Iterable[Player]]) -> None:
         """
-        Заменяет игрока по индексу
+        Заменяет игрока (или срез игроков) по индексу
 
         Аргументы:
-        index - индекс игрока для замены
-        player - новый объект игрока
+        index - индекс игрока для замены или срез
+        player - новый объект игрока (для среза - новые игроки)
         """
-        self._players[index] = player
-
-    def __delitem__(self, index: int) -> None:
+        if isinstance(index, slice):
+            new_players = list(player)
+            old_players = self._players[index]
+            self._players[index] = new_players
+        else:
+            new_players = [player]
+            old_players = [self._players[index]]
+            self._players[index] = player
+        self._positions = None
+        for old_player in old_players:
+            self._index_remove(old_player)
+        for new_player in new_players:
+            self._index_add(new_player)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
         """
-        Удаляет игрока по индексу
+        Удаляет игрока (или срез игроков) по индексу
 
         Аргументы:
-        index - индекс игрока
+        index - индекс игрока или срез
         """
+        removed = self._players[index]
         del self._players[index]
+        self._positions = None
+        for player in (removed if isinstance(index, slice) else [removed]):
+            self._index_remove(player)
 
     def insert(self, index: int, player: Player) -> None:
         """
@@ -122,7 +264,49 @@ class PlayerCollection(MutableSequence):
         index - индекс для внедрения игрока
         player - игрок для внедрения (в банду)
         """
+        positions = self._positions
+        if positions is not None:
+            if index >= len(self._players) and id(player) not in positions:
+                positions[id(player)] = len(self._players)
+            else:
+                self._positions = None
         self._players.insert(index, player)
+        self._index_add(player)
+
+    def swap_remove(self, player: Player) -> None:
+        """
+        Удаляет игрока за O(1): на его место ставится последний игрок коллекции,
+        поэтому порядок остальных игроков меняется
+
+        Аргументы:
+        player - удаляемый игрок (сам объект из коллекции)
+        """
+        if self._positions is None:
+            self._positions = {id(item): pos for pos, item in enumerate(self._players)}
+        positions = self._positions
+        pos = positions.pop(id(player), None)
+        if pos is None or self._players[pos] is not player:
+            raise ValueError(f'{player!r} нет в коллекции')
+        last = self._players.pop()
+        if last is not player:
+            self._players[pos] = last
+            positions[id(last)] = pos
+        self._index_remove(player)
+        if player in self:
+            self._positions = None
+
+    def __contains__(self, player: object) -> bool:
+        """
+        Проверяет наличие игрока через индекс по именам
+
+        Аргументы:
+        player - игрок
+
+        Возвращает:
+        True - если игрок есть в коллекции, иначе False
+        """
+        bucket = self._by_name.get(getattr(player, 'name', None), ())
+        return any(item is player or item == player for item in bucket)
 
     def __iter__(self) -> Iterator[Player]:
         """
@@ -150,19 +334,680 @@ class PlayerCollection(MutableSequence):
         Возвращает:
         объект Player если такой есть, иначе None
         """
-        for player in self._players:
-#            if player.name is name: #Ошибка 3: использование is для сравнения строк
-            if player.name == name:
-                return player
-        return None
+        bucket = self._by_name.get(name)
+        return bucket[0] if bucket else None
 
     def get_players_with_balance(self) -> List[Player]:
         """
         Возвращает:
-        список игроков с положительным балансом
+        список игроков с положительным балансом в порядке коллекции
+        (порядок _solvent зависит от истории балансов, поэтому наружу не отдаётся)
         """
         return [player for player in self._players if player.balance > 0]
 
+    def fork(self) -> 'PlayerCollection':
+        """
+        Создаёт независимую копию коллекции с новыми объектами Player
+
+        Возвращает:
+        новую PlayerCollection с теми же именами, балансами и порядком _solvent
+        """
+        child = PlayerCollection([Player(player.name, player.balance) for player in self._players])
+        child.set_solvent_order(self.solvent_order())
+        return child
+
+    def count_with_balance(self) -> int:
+        """
+        Возвращает:
+        количество игроков с положительным балансом
+        """
+        return len(self._solvent)
+
+    def random_with_balance(self, rng: random.Random) -> Optional[Player]:
+        """
+        Выбирает случайного игрока с положительным балансом за O(1)
+
+        Аргументы:
+        rng - генератор случайных чисел (например, Casino.rng)
+
+        Возвращает:
+        объект Player или None, если все игроки без денег
+        """
+        if not self._solvent:
+            return None
+        return rng.choice(self._solvent)
+
+    def solvent_order(self) -> List[int]:
+        """
+        Возвращает:
+        позиции игроков с положительным балансом в порядке _solvent
+        (от него зависит random_with_balance, поэтому порядок сохраняется в снимках и копиях)
+        """
+        positions = {id(player): pos for pos, player in enumerate(self._players)}
+        return [positions[id(player)] for player in self._solvent]
+
+    def set_solvent_order(self, order: Iterable[int]) -> None:
+        """
+        Восстанавливает порядок _solvent, полученный из solvent_order
+
+        Аргументы:
+        order - позиции игроков с положительным балансом в нужном порядке
+        """
+        solvent = [self._players[pos] for pos in order]
+        if sorted(map(id, solvent)) != sorted(map(id, self._solvent)):
+            raise ValueError('Порядок должен содержать всех игроков с положительным балансом')
+        self._solvent = solvent
+        self._solvent_pos = {player: pos for pos, player in enumerate(solvent)}
+
+
+class PlayerView(Player):
+    """
+    Представление игрока, данные которого хранятся в ArrayPlayerCollection.
+    Ведёт себя как Player: чтение и запись name и balance идут напрямую в массивы коллекции
+
+    Атрибуты:
+    _store - коллекция, в которой хранятся данные игрока
+    _slot - номер ячейки игрока в массивах коллекции
+    """
+
+    __slots__ = ('_store', '_slot')
+
+    def __init__(self, store: 'ArrayPlayerCollection', slot: int):
+        """
+        Инициализация представления
+
+        Аргументы:
+        store - коллекция с данными игрока
+        slot - номер ячейки игрока
+        """
+        self._store = store
+        self._slot = slot
+        self._watchers = None
+
+    @property
+    def name(self) -> str:
+        """
+        Возвращает:
+        имя игрока
+        """
+        return self._store._names[self._slot]
+
+    @name.setter
+    def name(self, value: str) -> None:
+        """
+        Меняет имя игрока (с обновлением индекса имён коллекции)
+
+        Аргументы:
+        value - новое имя
+        """
+        self._store._rename(self._slot, value)
+
+    @property
+    def balance(self) -> int:
+        """
+        Возвращает:
+        текущий баланс игрока
+        """
+        return self._store._balances[self._slot]
+
+    @balance.setter
+    def balance(self, value: int) -> None:
+        """
+        Устанавливает баланс игрока в массиве коллекции
+
+        Аргументы:
+        value - новый баланс
+        """
+        self._store._set_balance(self._slot, value)
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Представления равны, если указывают на одну ячейку одной коллекции
+        """
+        if isinstance(other, PlayerView):
+            return self._store is other._store and self._slot == other._slot
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """
+        Возвращает:
+        хэш пары (коллекция, ячейка)
+        """
+        return hash((id(self._store), self._slot))
+
+
+class _OverlayArray:
+    """
+    Балансы ветки: общий для всех веток снимок массива и словарь изменённых ячеек.
+    Запись попадает только в словарь, снимок не меняется
+
+    Атрибуты:
+    base - общий снимок array('q')
+    changes - словарь ячейка -> баланс ветки
+    """
+
+    __slots__ = ('base', 'changes')
+
+    def __init__(self, base: array):
+        """
+        инициализация слоя
+
+        Аргументы:
+        base - снимок балансов (не изменяется)
+        """
+        self.base = base
+        self.changes: Dict[int, int] = {}
+
+    def __getitem__(self, slot: int) -> int:
+        """
+        Возвращает:
+        баланс ячейки (из слоя, если ячейка изменена, иначе из снимка)
+        """
+        value = self.changes.get(slot)
+        return self.base[slot] if value is None else value
+
+    def __setitem__(self, slot: int, value: int) -> None:
+        """
+        Записывает баланс ячейки в слой
+        """
+        self.changes[slot] = value
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество ячеек
+        """
+        return len(self.base)
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Возвращает:
+        итератор балансов по ячейкам
+        """
+        if not self.changes:
+            return iter(self.base)
+        return map(self.__getitem__, range(len(self.base)))
+
+
+class ArrayPlayerCollection(MutableSequence):
+    """
+    Коллекция игроков в виде структуры массивов: имена в списке, балансы в array('q').
+    Объекты игроков не хранятся - при обращении выдаются представления PlayerView.
+    Добавленный Player копируется в массивы, дальнейшие изменения нужно делать
+    через представления. Срез - независимая копия.
+    Ветки (branches) делят массивы с исходной коллекцией: балансы ветки - слой
+    поверх общего снимка, остальные массивы копируются при первом изменении
+    Массовые операции (сумма балансов, top-k, изменение балансов многих игроков)
+    работают по массивам, без создания объектов
+
+    Атрибуты:
+    _names - имена по ячейкам (None - свободная ячейка)
+    _balances - балансы по ячейкам
+    _order - номера ячеек в порядке последовательности
+    _free - свободные ячейки для повторного использования
+    _by_name - словарь имя -> список ячеек с этим именем (в порядке добавления)
+    _solvent - ячейки игроков с положительным балансом
+    _solvent_pos - позиция ячейки в _solvent (-1 если баланс не положительный)
+    _positions - словарь ячейка -> позиция в _order для swap_remove
+    (None - не построен, строится заново после вставок в середину и удалений по индексу)
+    _shared - имена полей, которые пока общие с другой коллекцией (копируются при записи)
+    """
+
+    SHARED_FIELDS = ('_names', '_order', '_free', '_by_name', '_solvent', '_solvent_pos')
+
+    def __init__(self, players: Optional[Iterable[Player]] = None):
+        """
+        инициализация коллекции
+
+        Аргументы:
+        players - игроки, данные которых копируются в коллекцию. По умолчанию пусто
+        """
+        self._names: List[Optional[str]] = []
+        self._balances = array('q')
+        self._order = array('q')
+        self._free: List[int] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self._solvent = array('q')
+        self._solvent_pos = array('q')
+        self._positions: Optional[Dict[int, int]] = None
+        self._shared: set = set()
+        if players is not None:
+            self._load(players)
+
+    def _load(self, players: Iterable[Player]) -> None:
+        """
+        Заполняет пустую коллекцию одним проходом по массивам
+
+        Аргументы:
+        players - игроки, данные которых копируются в коллекцию
+        """
+        rows = [(player.name, player.balance) for player in players]
+        count = len(rows)
+        self._names = [name for name, _ in rows]
+        self._balances = array('q', [balance for _, balance in rows])
+        self._order = array('q', range(count))
+        for slot, name in enumerate(self._names):
+            self._by_name.setdefault(name, []).append(slot)
+        self._solvent = array('q', compress(range(count), map((0).__lt__, self._balances)))
+        self._solvent_pos = array('q', [-1]) * count
+        for pos, slot in enumerate(self._solvent):
+            self._solvent_pos[slot] = pos
+
+    def _own(self, *fields: str) -> None:
+        """
+        Копирует общие с другой коллекцией поля перед их изменением
+
+        Аргументы:
+        fields - имена полей ('_balances' - превратить слой ветки в обычный массив)
+        """
+        if not self._shared and not isinstance(self._balances, _OverlayArray):
+            return
+        for field in fields:
+            if field == '_balances':
+                if isinstance(self._balances, _OverlayArray):
+                    self._balances = array('q', self._balances)
+            elif field in self._shared:
+                self._shared.discard(field)
+                value = getattr(self, field)
+                if field == '_by_name':
+                    value = {name: list(slots) for name, slots in value.items()}
+                else:
+                    value = value[:]
+                setattr(self, field, value)
+
+    def _alloc(self, name: str, balance: int) -> int:
+        """
+        Занимает ячейку под игрока
+
+        Аргументы:
+        name - имя игрока
+        balance - баланс игрока
+
+        Возвращает:
+        номер ячейки
+        """
+        if self._free:
+            self._own('_free', '_names', '_by_name')
+            slot = self._free.pop()
+            self._names[slot] = name
+        else:
+            self._own('_names', '_balances', '_solvent_pos', '_by_name')
+            slot = len(self._names)
+            self._names.append(name)
+            self._balances.append(0)
+            self._solvent_pos.append(-1)
+        self._by_name.setdefault(name, []).append(slot)
+        self._set_balance(slot, balance)
+        return slot
+
+    def _release(self, slot: int) -> None:
+        """
+        Освобождает ячейку игрока
+
+        Аргументы:
+        slot - номер ячейки
+        """
+        self._set_balance(slot, 0)
+        self._own('_names', '_free')
+        self._unindex(slot)
+        self._names[slot] = None
+        self._free.append(slot)
+
+    def _unindex(self, slot: int) -> None:
+        """
+        Удаляет ячейку из индекса имён
+
+        Аргументы:
+        slot - номер ячейки
+        """
+        self._own('_by_name')
+        name = self._names[slot]
+        bucket = self._by_name[name]
+        bucket.remove(slot)
+        if not bucket:
+            del self._by_name[name]
+
+    def _rename(self, slot: int, name: str) -> None:
+        """
+        Меняет имя в ячейке
+
+        Аргументы:
+        slot - номер ячейки
+        name - новое имя
+        """
+        self._own('_names')
+        self._unindex(slot)
+        self._names[slot] = name
+        self._by_name.setdefault(name, []).append(slot)
+
+    def _set_balance(self, slot: int, value: int) -> None:
+        """
+        Записывает баланс и обновляет множество платёжеспособных игроков
+
+        Аргументы:
+        slot - номер ячейки
+        value - новый баланс
+        """
+        old = self._balances[slot]
+        self._balances[slot] = value
+        if (old > 0) != (value > 0):
+            self._solvency_changed(slot, value > 0)
+
+    def _solvency_changed(self, slot: int, solvent: bool) -> None:
+        """
+        Обновляет множество платёжеспособных ячеек (удаление - обменом с последней)
+
+        Аргументы:
+        slot - номер ячейки
+        solvent - True если баланс стал положительным
+        """
+        self._own('_solvent', '_solvent_pos')
+        if solvent:
+            self._solvent_pos[slot] = len(self._solvent)
+            self._solvent.append(slot)
+        else:
+            pos = self._solvent_pos[slot]
+            last = self._solvent.pop()
+            if last != slot:
+                self._solvent[pos] = last
+                self._solvent_pos[last] = pos
+            self._solvent_pos[slot] = -1
+
+    def _add_to_slots(self, slots: Iterable[int], delta: int) -> None:
+        """
+        Прибавляет delta к балансам ячеек одним проходом; множество платёжеспособных
+        обновляется только для ячеек, баланс которых перешёл через ноль
+
+        Аргументы:
+        slots - номера ячеек
+        delta - изменение баланса
+        """
+        balances = self._balances
+        crossed = []
+        for slot in slots:
+            old = balances[slot]
+            new = old + delta
+            balances[slot] = new
+            if (old > 0) != (new > 0):
+                crossed.append(slot)
+        for slot in crossed:
+            self._solvency_changed(slot, balances[slot] > 0)
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество игроков
+        """
+        return len(self._order)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Player, 'ArrayPlayerCollection']:
+        """
+        Возвращает либо представление игрока по индексу, либо копию среза
+
+        Аргументы:
+        index - либо номер игрока, либо срез
+
+        Возвращает:
+        либо PlayerView, либо ArrayPlayerCollection
+        """
+        if isinstance(index, slice):
+            return ArrayPlayerCollection(PlayerView(self, slot) for slot in self._order[index])
+        return PlayerView(self, self._order[index])
+
+    def __setitem__(self, index: Union[int, slice], player: Union[Player, Iterable[Player]]) -> None:
+        """
+        Заменяет данные игрока (или среза игроков) по индексу
+
+        Аргументы:
+        index - индекс игрока для замены или срез
+        player - игрок, данные которого копируются (для среза - игроки)
+        """
+        if isinstance(index, slice):
+            rows = [(item.name, item.balance) for item in player]
+            removed = self._order[index]
+            if index.step not in (None, 1) and len(rows) != len(removed):
+                raise ValueError(f'attempt to assign sequence of size {len(rows)} '
+                                 f'to extended slice of size {len(removed)}')
+            slots = array('q', [self._alloc(name, balance) for name, balance in rows])
+            self._own('_order')
+            self._order[index] = slots
+            self._positions = None
+            for slot in removed:
+                self._release(slot)
+            return
+        slot = self._order[index]
+        name, balance = player.name, player.balance
+        self._rename(slot, name)
+        self._set_balance(slot, balance)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        """
+        Удаляет игрока (или срез игроков) по индексу
+
+        Аргументы:
+        index - индекс игрока или срез
+        """
+        self._own('_order')
+        removed = self._order[index]
+        del self._order[index]
+        self._positions = None
+        for slot in (removed if isinstance(index, slice) else [removed]):
+            self._release(slot)
+
+    def insert(self, index: int, player: Player) -> None:
+        """
+        Вставляет копию игрока по индексу
+
+        Аргументы:
+        index - индекс для вставки
+        player - игрок, данные которого копируются
+        """
+        slot = self._alloc(player.name, player.balance)
+        self._own('_order')
+        if self._positions is not None:
+            if index >= len(self._order):
+                self._positions[slot] = len(self._order)
+            else:
+                self._positions = None
+        self._order.insert(index, slot)
+
+    def swap_remove(self, player: Player) -> None:
+        """
+        Удаляет игрока за O(1): на его место ставится последний игрок коллекции,
+        поэтому порядок остальных игроков меняется
+
+        Аргументы:
+        player - представление игрока этой коллекции (PlayerView)
+        """
+        if not (isinstance(player, PlayerView) and player._store is self and self._names[player._slot] is not None):
+            raise ValueError('Игрока нет в коллекции')
+        self._own('_order')
+        if self._positions is None:
+            self._positions = {slot: pos for pos, slot in enumerate(self._order)}
+        slot = player._slot
+        pos = self._positions.pop(slot)
+        last = self._order.pop()
+        if last != slot:
+            self._order[pos] = last
+            self._positions[last] = pos
+        self._release(slot)
+
+    def __iter__(self) -> Iterator[Player]:
+        """
+        Возвращает:
+        итератор представлений игроков
+        """
+        return (PlayerView(self, slot) for slot in self._order)
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'ArrayPlayerCollection({players})'
+        """
+        return f'ArrayPlayerCollection({list(self)})'
+
+    def find_by_name(self, name: str) -> Optional[Player]:
+        """
+        Находит игрока по имени за O(1)
+
+        Аргументы:
+        name - имя игрока
+
+        Возвращает:
+        PlayerView если такой игрок есть, иначе None
+        """
+        bucket = self._by_name.get(name)
+        return PlayerView(self, bucket[0]) if bucket else None
+
+    def get_players_with_balance(self) -> List[Player]:
+        """
+        Возвращает:
+        список представлений игроков с положительным балансом в порядке коллекции
+        (порядок _solvent зависит от истории балансов, поэтому наружу не отдаётся)
+        """
+        balances = self._balances
+        return [PlayerView(self, slot) for slot in self._order if balances[slot] > 0]
+
+    def count_with_balance(self) -> int:
+        """
+        Возвращает:
+        количество игроков с положительным балансом
+        """
+        return len(self._solvent)
+
+    def random_with_balance(self, rng: random.Random) -> Optional[Player]:
+        """
+        Выбирает случайного игрока с положительным балансом за O(1)
+
+        Аргументы:
+        rng - генератор случайных чисел (например, Casino.rng)
+
+        Возвращает:
+        PlayerView или None, если все игроки без денег
+        """
+        if not self._solvent:
+            return None
+        return PlayerView(self, rng.choice(self._solvent))
+
+    def solvent_order(self) -> List[int]:
+        """
+        Возвращает:
+        позиции игроков с положительным балансом в порядке _solvent
+        (от него зависит random_with_balance, поэтому порядок сохраняется в снимках и копиях)
+        """
+        positions = {slot: pos for pos, slot in enumerate(self._order)}
+        return [positions[slot] for slot in self._solvent]
+
+    def set_solvent_order(self, order: Iterable[int]) -> None:
+        """
+        Восстанавливает порядок _solvent, полученный из solvent_order
+
+        Аргументы:
+        order - позиции игроков с положительным балансом в нужном порядке
+        """
+        solvent = array('q', [self._order[pos] for pos in order])
+        if sorted(solvent) != sorted(self._solvent):
+            raise ValueError('Порядок должен содержать всех игроков с положительным балансом')
+        self._own('_solvent_pos')
+        self._shared.discard('_solvent')
+        self._solvent = solvent
+        for pos, slot in enumerate(solvent):
+            self._solvent_pos[slot] = pos
+
+    def branches(self, n: int) -> List['ArrayPlayerCollection']:
+        """
+        Создаёт n независимых веток коллекции без копирования данных по веткам.
+        Балансы копируются один раз в общий снимок, каждая ветка пишет изменения
+        в свой слой; остальные массивы общие и копируются веткой (или этой
+        коллекцией) только при первом изменении состава игроков
+
+        Аргументы:
+        n - количество веток
+
+        Возвращает:
+        список новых ArrayPlayerCollection с теми же данными
+        """
+        base = array('q', self._balances)
+        self._shared.update(self.SHARED_FIELDS)
+        children = []
+        for _ in range(n):
+            child = ArrayPlayerCollection()
+            for field in self.SHARED_FIELDS:
+                setattr(child, field, getattr(self, field))
+            child._shared = set(self.SHARED_FIELDS)
+            child._balances = _OverlayArray(base)
+            children.append(child)
+        return children
+
+    def fork(self) -> 'ArrayPlayerCollection':
+        """
+        Создаёт независимую копию коллекции (одну ветку, см. branches)
+
+        Возвращает:
+        новую ArrayPlayerCollection с теми же данными
+        """
+        return self.branches(1)[0]
+
+    def total_balance(self) -> int:
+        """
+        Возвращает:
+        сумму балансов всех игроков (свободные ячейки хранят 0)
+        """
+        return sum(self._balances)
+
+    def top_k(self, k: int) -> List[Player]:
+        """
+        Находит k самых богатых игроков
+
+        Аргументы:
+        k - количество игроков
+
+        Возвращает:
+        список представлений игроков по убыванию баланса
+        """
+        slots = heapq.nlargest(k, self._order, key=self._balances.__getitem__)
+        return [PlayerView(self, slot) for slot in slots]
+
+    def apply_delta(self, delta: int, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Изменяет балансы многих игроков на одну и ту же величину
+
+        Аргументы:
+        delta - изменение баланса
+        names - имена игроков (по умолчанию - все игроки)
+        """
+        if names is not None:
+            self._add_to_slots([slot for name in names for slot in self._by_name.get(name, ())], delta)
+            return
+        old = self._balances
+        new = array('q', map(delta.__add__, old))
+        for slot in self._free:
+            new[slot] = 0
+        self._balances = new
+        positive = (0).__lt__
+        for slot in compress(range(len(new)), map(operator.ne, map(positive, old), map(positive, new))):
+            self._solvency_changed(slot, new[slot] > 0)
+
+    def apply_delta_where(self, delta: int, mask: Iterable[str]) -> List[tuple]:
+        """
+        Изменяет балансы игроков, отмеченных в маске, на одну и ту же величину
+
+        Аргументы:
+        delta - изменение баланса
+        mask - по символу на игрока в порядке коллекции: '1' - изменить баланс
+
+        Возвращает:
+        список пар (имя, новый баланс) изменённых игроков
+        """
+        slots = list(compress(self._order, map('1'.__eq__, mask)))
+        self._add_to_slots(slots, delta)
+        names, balances = self._names, self._balances
+        return [(names[slot], balances[slot]) for slot in slots]
+
+
+PlayerStore = Union[PlayerCollection, ArrayPlayerCollection]
+"""Коллекция игроков казино: PlayerCollection или ArrayPlayerCollection (общий набор методов)"""
+
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -1,6 +1,15 @@
 import src.Players, src.We_need_one_more_goose
+import math
+import pickle
 import random
-from typing import MutableMapping, List, Dict, Iterator
+import time
+import tracemalloc
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import ChainMap
+from itertools import accumulate, islice
+from typing import Mapping, MutableMapping, List, Dict, Iterable, Iterator, Optional, Tuple
 
 
 class Chip:
@@ -14,6 +23,8 @@ class Chip:
     __add__ - складывает две фишки, возвращая новую фишку с суммой номиналов
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value: int):
         """
         инициализация фишки с заданным номиналом
@@ -45,24 +56,627 @@ class Chip:
         return f'Chip(value={self.value})'
 
 
+class ChipPool:
+    """
+    Пул фишек казино. Номиналы хранятся в компактном массиве array('q'),
+    объекты Chip создаются только по запросу (при обращении по индексу или итерации).
+    Когда в пуле уже capacity фишек, новая фишка объединяется со случайной фишкой пула,
+    поэтому пул не растёт бесконечно
+
+    Атрибуты:
+    values - номиналы фишек
+    capacity - количество фишек, после которого новые фишки объединяются с существующими
+
+    Методы:
+    add - добавляет фишку
+    merge_in - объединяет новую фишку со случайной фишкой пула
+    total - суммарный номинал фишек
+    """
+
+    def __init__(self, values: Optional[Iterable[int]] = None, capacity: int = 2):
+        """
+        Инициализация пула фишек
+
+        Аргументы:
+        values - начальные номиналы фишек (по умолчанию пул пустой)
+        capacity - порог объединения фишек (по умолчанию 2)
+        """
+        if capacity < 1:
+            raise ValueError('Размер пула фишек должен быть положительным')
+        self.values = array('q', values if values is not None else [])
+        self.capacity = capacity
+
+    def add(self, value: int) -> None:
+        """
+        Добавляет фишку в пул
+
+        Аргументы:
+        value - номинал фишки
+        """
+        self.values.append(value)
+
+    def merge_in(self, value: int, rng: random.Random) -> Tuple[int, int]:
+        """
+        Объединяет новую фишку со случайной фишкой пула за O(1):
+        выбранная фишка заменяется объединённой
+
+        Аргументы:
+        value - номинал новой фишки
+        rng - генератор случайных чисел (например, Casino.rng)
+
+        Возвращает:
+        пару (номинал выбранной фишки, номинал объединённой фишки)
+        """
+        if not self.values:
+            self.values.append(value)
+            return 0, value
+        index = rng.randrange(len(self.values))
+        other = self.values[index]
+        self.values[index] = other + value
+        return other, other + value
+
+    def total(self) -> int:
+        """
+        Возвращает:
+        суммарный номинал всех фишек пула
+        """
+        return sum(self.values)
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество фишек в пуле
+        """
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> Chip:
+        """
+        Возвращает фишку по индексу
+
+        Аргументы:
+        index - номер фишки
+
+        Возвращает:
+        объект Chip с номиналом фишки
+        """
+        return Chip(self.values[index])
+
+    def __iter__(self) -> Iterator[Chip]:
+        """
+        Возвращает:
+        итератор объектов Chip
+        """
+        return (Chip(value) for value in self.values)
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'ChipPool({values})'
+        """
+        return f'ChipPool({list(self.values)})'
+
+
+class BalanceLog:
+    """
+    Столбцовое хранилище изменений балансов.
+    Каждое изменение занимает четыре числа: номер ключа, старое значение, новое значение
+    и номер шага. Строки для чтения собираются только по запросу
+
+    Режимы хранения:
+    full - хранит все изменения
+    ring - хранит только последние capacity изменений (кольцевой буфер)
+    sample - хранит каждое every-е изменение
+    off - ничего не хранит, только считает изменения
+
+    Атрибуты:
+    mode - режим хранения
+    keys - имена ключей (номер ключа - индекс в этом списке)
+    key_id - номера ключей изменений
+    old - старые значения
+    new - новые значения
+    step - номера шагов, на которых произошли изменения
+    total - количество всех изменений, включая не сохранённые
+    evicted - количество изменений, вытесненных из кольцевого буфера
+    skipped - количество изменений, пропущенных режимами sample и off
+    _base - лог, от которого ответвлён этот лог (первые _base_len изменений общие)
+    _base_len - количество общих с _base изменений
+
+    Для ответвлённого лога столбцы key_id, old, new, step содержат только изменения
+    после ответвления, полная история доступна через итерацию и record
+
+    Методы:
+    append - добавляет изменение
+    record - возвращает изменение по индексу
+    format - возвращает изменение в виде строки
+    fork - создаёт ветку лога, разделяющую уже записанные изменения
+    """
+
+    MODES = ('full', 'ring', 'sample', 'off')
+
+    def __init__(self, mode: str = 'full', capacity: int = 0, every: int = 1):
+        """
+        Инициализация пустых столбцов
+
+        Аргументы:
+        mode - режим хранения (по умолчанию full)
+        capacity - размер кольцевого буфера для режима ring
+        every - шаг выборки для режима sample
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'Неизвестный режим лога: {mode}')
+        if mode == 'ring' and capacity <= 0:
+            raise ValueError('Для режима ring нужен положительный capacity')
+        if mode == 'sample' and every <= 0:
+            raise ValueError('Для режима sample нужен положительный every')
+        self.mode = mode
+        self.capacity = capacity
+        self.every = every
+        self.keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self.key_id = array('i')
+        self.old = array('i')
+        self.new = array('i')
+        self.step = array('i')
+        self._head = 0
+        self.total = 0
+        self.evicted = 0
+        self.skipped = 0
+        self._base: Optional['BalanceLog'] = None
+        self._base_len = 0
+
+    def _widen(self) -> None:
+        """
+        Переводит столбцы значений на 64-битные числа, если значение не влезло в 32 бита
+        """
+        if self.old.typecode != 'q':
+            self.old = array('q', self.old)
+            self.new = array('q', self.new)
+
+    def _key(self, key: str) -> int:
+        """
+        Возвращает номер ключа, регистрируя новый ключ при необходимости
+
+        Аргументы:
+        key - имя игрока или гуся
+        """
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self._key_ids[key] = key_id
+            self.keys.append(key)
+        return key_id
+
+    def append(self, key: str, old_value: int, new_value: int, step: int) -> None:
+        """
+        Добавляет изменение баланса с учётом режима хранения
+
+        Аргументы:
+        key - имя игрока или гуся
+        old_value - старое значение баланса
+        new_value - новое значение баланса
+        step - номер шага
+        """
+        self.total += 1
+        mode = self.mode
+        if mode == 'off' or (mode == 'sample' and (self.total - 1) % self.every):
+            self.skipped += 1
+            return
+
+        key_id = self._key(key)
+        if mode == 'ring' and len(self.key_id) >= self.capacity:
+            pos = self._head
+            self._head = (pos + 1) % self.capacity
+            self.evicted += 1
+            try:
+                self.old[pos] = old_value
+                self.new[pos] = new_value
+            except OverflowError:
+                self._widen()
+                self.old[pos] = old_value
+                self.new[pos] = new_value
+            self.key_id[pos] = key_id
+            self.step[pos] = step
+            return
+
+        try:
+            self.old.append(old_value)
+        except OverflowError:
+            self._widen()
+            self.old.append(old_value)
+        try:
+            self.new.append(new_value)
+        except OverflowError:
+            self._widen()
+            self.new.append(new_value)
+        self.key_id.append(key_id)
+        self.step.append(step)
+
+    def extend(self, keys: List[str], old_values: List[int], new_values: List[int], step: int) -> None:
+        """
+        Добавляет пачку изменений одного шага. В режиме full столбцы расширяются
+        за один вызов, в остальных режимах изменения добавляются по одному
+
+        Аргументы:
+        keys - имена игроков или гусей
+        old_values - старые значения балансов
+        new_values - новые значения балансов
+        step - номер шага
+        """
+        if self.mode != 'full':
+            for key, old_value, new_value in zip(keys, old_values, new_values):
+                self.append(key, old_value, new_value, step)
+            return
+
+        self.total += len(keys)
+        try:
+            old_column = array(self.old.typecode, old_values)
+            new_column = array(self.new.typecode, new_values)
+        except OverflowError:
+            self._widen()
+            old_column = array('q', old_values)
+            new_column = array('q', new_values)
+        self.key_id.extend([self._key(key) for key in keys])
+        self.old.extend(old_column)
+        self.new.extend(new_column)
+        self.step.extend(array('i', [step]) * len(keys))
+
+    def fork(self) -> 'BalanceLog':
+        """
+        Создаёт ветку лога. В режимах full и sample уже записанные изменения
+        не копируются, а разделяются с исходным логом (он только дописывается).
+        Кольцевой буфер копируется, так как исходный лог его перезаписывает
+
+        Возвращает:
+        новый BalanceLog с общей историей до момента ответвления
+        """
+        child = BalanceLog(self.mode, self.capacity, self.every)
+        child.total, child.evicted, child.skipped = self.total, self.evicted, self.skipped
+        if self.mode == 'ring':
+            child.keys = list(self.keys)
+            child._key_ids = dict(self._key_ids)
+            child.key_id = array('i', self.key_id)
+            child.old = array(self.old.typecode, self.old)
+            child.new = array(self.new.typecode, self.new)
+            child.step = array('i', self.step)
+            child._head = self._head
+        elif len(self):
+            child._base = self
+            child._base_len = len(self)
+        return child
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество сохранённых изменений
+        """
+        return self._base_len + len(self.key_id)
+
+    def record(self, index: int) -> Tuple[str, int, int, int]:
+        """
+        Возвращает сохранённое изменение по индексу (от старых к новым)
+
+        Аргументы:
+        index - номер изменения
+
+        Возвращает:
+        кортеж (ключ, старое значение, новое значение, шаг)
+        """
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('BalanceLog index out of range')
+        if index < self._base_len:
+            return self._base.record(index)
+        index -= self._base_len
+        pos = (self._head + index) % len(self.key_id)
+        return self.keys[self.key_id[pos]], self.old[pos], self.new[pos], self.step[pos]
+
+    def __iter__(self) -> Iterator[Tuple[str, int, int, int]]:
+        """
+        Возвращает:
+        итератор по изменениям в виде кортежей (ключ, старое, новое, шаг) от старых к новым
+        """
+        if self._base is not None:
+            yield from islice(self._base, self._base_len)
+        keys = self.keys
+        head = self._head
+        columns = (self.key_id, self.old, self.new, self.step)
+        if head:
+            columns = tuple(column[head:] + column[:head] for column in columns)
+        for key_id, old_value, new_value, step in zip(*columns):
+            yield keys[key_id], old_value, new_value, step
+
+    @staticmethod
+    def format(key: str, old_value: int, new_value: int) -> str:
+        """
+        Собирает строку лога для одного изменения
+
+        Аргументы:
+        key - имя игрока или гуся
+        old_value - старое значение баланса
+        new_value - новое значение баланса
+
+        Возвращает:
+        строку в формате 'Баланс {key}: {old} -> {new} (Изменение: {change})'
+        """
+        change = new_value - old_value
+        sign = '+' if change >= 0 else ''
+        return f'Баланс {key}: {old_value} -> {new_value} (Изменение: {sign}{change})'
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'BalanceLog(changes={changes})'
+        """
+        return f'BalanceLog(mode={self.mode}, changes={len(self)}, total={self.total})'
+
+
+class BalanceHistory:
+    """
+    Индекс истории балансов по ключам для запросов на момент шага.
+    Для каждого ключа хранятся массивы номеров шагов и изменений значения (дельт),
+    а каждое ANCHOR_EVERY-е значение - целиком (опорная точка). Поиск шага -
+    бинарный, значение восстанавливается от ближайшей опорной точки, поэтому
+    запрос стоит O(log n + ANCHOR_EVERY), а память растёт только с числом изменений
+
+    Атрибуты:
+    _steps - словарь ключ -> array('q') номеров шагов изменений
+    _deltas - словарь ключ -> array('q') изменений значения
+    _anchors - словарь ключ -> array('q') опорных значений
+    _last - словарь ключ -> последнее записанное значение (первое собственное
+    изменение ключа - всегда опорная точка, поэтому ветке прошлые значения не нужны)
+    _base - история, от которой ответвлена эта (общие изменения не копируются)
+    _base_len - словарь ключ -> количество общих с _base изменений ключа
+
+    Методы:
+    record - добавляет изменение
+    at - значение ключа на шаге
+    history - изменения ключа в диапазоне шагов
+    fork - создаёт ветку истории, разделяющую уже записанные изменения
+    """
+
+    ANCHOR_EVERY = 32
+
+    def __init__(self):
+        """
+        Инициализация пустой истории
+        """
+        self._steps: Dict[str, array] = {}
+        self._deltas: Dict[str, array] = {}
+        self._anchors: Dict[str, array] = {}
+        self._last: Dict[str, int] = {}
+        self._base: Optional['BalanceHistory'] = None
+        self._base_len: Dict[str, int] = {}
+
+    def record(self, key: str, value: int, step: int) -> None:
+        """
+        Добавляет изменение значения ключа
+
+        Аргументы:
+        key - имя игрока или гуся
+        value - новое значение
+        step - номер шага
+        """
+        steps = self._steps.get(key)
+        if steps is None:
+            steps = self._steps[key] = array('q')
+            self._deltas[key] = array('q')
+            self._anchors[key] = array('q')
+        if len(steps) % self.ANCHOR_EVERY == 0:
+            self._anchors[key].append(value)
+        self._deltas[key].append(value - self._last.get(key, 0))
+        steps.append(step)
+        self._last[key] = value
+
+    def _value(self, key: str, index: int) -> int:
+        """
+        Восстанавливает значение ключа после изменения с номером index
+
+        Аргументы:
+        key - имя игрока или гуся
+        index - номер изменения в собственных массивах
+        """
+        anchor = index // self.ANCHOR_EVERY
+        start = anchor * self.ANCHOR_EVERY + 1
+        return self._anchors[key][anchor] + sum(self._deltas[key][start:index + 1])
+
+    def _limit(self, key: str, limit: Optional[int]) -> int:
+        """
+        Возвращает количество собственных изменений ключа, видимых с учётом limit
+        """
+        size = len(self._steps.get(key, ()))
+        return size if limit is None else min(size, limit)
+
+    def _at(self, key: str, step: int, limit: Optional[int] = None) -> Optional[int]:
+        """
+        Значение ключа на шаге с учётом только первых limit собственных изменений
+        """
+        size = self._limit(key, limit)
+        if size:
+            index = bisect_right(self._steps[key], step, 0, size)
+            if index:
+                return self._value(key, index - 1)
+        if self._base is not None and key in self._base_len:
+            return self._base._at(key, step, self._base_len[key])
+        return None
+
+    def _history(self, key: str, start: int, stop: Optional[int],
+                 limit: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Изменения ключа в диапазоне шагов с учётом только первых limit собственных изменений
+        """
+        result = []
+        if self._base is not None and key in self._base_len:
+            result = self._base._history(key, start, stop, self._base_len[key])
+        size = self._limit(key, limit)
+        if not size:
+            return result
+        steps = self._steps[key]
+        lo = bisect_left(steps, start, 0, size)
+        hi = size if stop is None else bisect_left(steps, stop, lo, size)
+        if lo < hi:
+            deltas = self._deltas[key]
+            value = self._value(key, lo)
+            result.append((steps[lo], value))
+            for index in range(lo + 1, hi):
+                value += deltas[index]
+                result.append((steps[index], value))
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Проверяет, есть ли у ключа хотя бы одно изменение
+        """
+        return key in self._steps or key in self._base_len
+
+    def at(self, key: str, step: int) -> Optional[int]:
+        """
+        Возвращает значение ключа после шага step
+
+        Аргументы:
+        key - имя игрока или гуся
+        step - номер шага
+
+        Возвращает:
+        значение или None, если до этого шага ключ не менялся
+        """
+        if key not in self:
+            raise KeyError(key)
+        return self._at(key, step)
+
+    def history(self, key: str, start: int = 0, stop: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Возвращает изменения ключа на шагах от start до stop (не включая stop)
+
+        Аргументы:
+        key - имя игрока или гуся
+        start - первый шаг диапазона (по умолчанию 0)
+        stop - шаг после конца диапазона (по умолчанию до конца истории)
+
+        Возвращает:
+        список пар (шаг, значение после изменения)
+        """
+        if key not in self:
+            raise KeyError(key)
+        return self._history(key, start, stop)
+
+    def branches(self, n: int) -> List['BalanceHistory']:
+        """
+        Создаёт n веток истории. Записанные изменения не копируются:
+        ветка видит первые _base_len изменений каждого ключа исходной истории,
+        а исходная история только дописывается. Словарь _base_len строится
+        один раз и общий для всех веток (ветки его не меняют)
+
+        Аргументы:
+        n - количество веток
+
+        Возвращает:
+        список новых BalanceHistory с общей историей до момента ответвления
+        """
+        base_len = dict.fromkeys(self._base_len, 0)
+        base_len.update((key, len(steps)) for key, steps in self._steps.items())
+        children = []
+        for _ in range(n):
+            child = BalanceHistory()
+            child._base = self
+            child._base_len = base_len
+            children.append(child)
+        return children
+
+    def fork(self) -> 'BalanceHistory':
+        """
+        Создаёт ветку истории (см. branches)
+
+        Возвращает:
+        новую BalanceHistory с общей историей до момента ответвления
+        """
+        return self.branches(1)[0]
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'BalanceHistory(keys={keys})'
+        """
+        return f'BalanceHistory(keys={len(set(self._steps) | set(self._base_len))})'
+
+
 class CasinoBalance(MutableMapping):
     """
     Управляет балансами гусей и игроков в казино (с логами)
 
     Атрибуты:
     _balances - словарь с балансами
-    _change_log - история изменения балансов
+    _change_log - история изменения балансов (столбцовый BalanceLog)
+    _history - индекс истории по ключам (BalanceHistory) или None, если он выключен
+    _listeners - функции, вызываемые при каждой записи баланса (не сохраняются в снимках)
+    step - номер текущего шага, которым помечаются изменения
 
     Методы:
+    add_listener - подписывает функцию на записи балансов
+    remove_listener - отписывает функцию
     get_log - возвращает историю изменения балансов
+    get_records - возвращает историю изменений в виде столбцов
+    at - баланс ключа на шаге
+    history - изменения баланса ключа в диапазоне шагов
+    fork - создаёт ветки балансов с копированием при записи
     """
 
-    def __init__(self):
+    def __init__(self, log_mode: str = 'full', log_capacity: int = 0, log_every: int = 1,
+                 history: bool = False):
         """
         Инициализация пустых балансов и логов
+
+        Аргументы:
+        log_mode - режим хранения лога: full, ring, sample или off (по умолчанию full)
+        log_capacity - размер кольцевого буфера для режима ring
+        log_every - шаг выборки для режима sample
+        history - вести ли индекс истории для at и history (по умолчанию нет:
+        индекс хранит каждое изменение, а лог может быть выключен ради памяти)
         """
         self._balances: Dict[str, int] = {}
-        self._change_log: List[str] = []
+        self._change_log = BalanceLog(log_mode, log_capacity, log_every)
+        self._history: Optional[BalanceHistory] = BalanceHistory() if history else None
+        self._listeners: List = []
+        self.step = 0
+
+    def add_listener(self, listener) -> None:
+        """
+        Подписывает функцию на каждую запись баланса. Слушатели получают изменения
+        при любом режиме лога (в том числе off, sample и ring)
+
+        Аргументы:
+        listener - функция listener(key, old_value, new_value)
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        """
+        Отписывает функцию от записей балансов
+
+        Аргументы:
+        listener - ранее подписанная функция
+        """
+        self._listeners.remove(listener)
+
+    def __getstate__(self) -> Dict:
+        """
+        Возвращает:
+        состояние для pickle без слушателей (они принадлежат текущему процессу)
+        """
+        state = self.__dict__.copy()
+        state['_listeners'] = []
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        """
+        Восстанавливает состояние из pickle
+
+        Аргументы:
+        state - словарь из __getstate__
+        """
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_listeners', [])
 
     def __getitem__(self, key: str) -> int:
         """
@@ -85,9 +699,58 @@ class CasinoBalance(MutableMapping):
         """
         old_value = self._balances.get(key, 0)
         self._balances[key] = value
-        change = value - old_value
-        log = f'Баланс {key}: {old_value} -> {value} (Изменение: {'+' if change >= 0 else ''}{change})'
-        self._change_log.append(log)
+        self._change_log.append(key, old_value, value, self.step)
+        if self._history is not None:
+            self._history.record(key, value, self.step)
+        for listener in self._listeners:
+            listener(key, old_value, value)
+
+    def update_many(self, pairs: Iterable[Tuple[str, int]]) -> None:
+        """
+        Устанавливает балансы для многих имён одной пачкой: лог расширяется
+        один раз на всю пачку вместо записи на каждый ключ
+
+        Аргументы:
+        pairs - пары (имя, новый баланс)
+        """
+        balances = self._balances
+        keys, old_values, new_values = [], [], []
+        for key, value in pairs:
+            keys.append(key)
+            old_values.append(balances.get(key, 0))
+            new_values.append(value)
+            balances[key] = value
+        if keys:
+            self._change_log.extend(keys, old_values, new_values, self.step)
+            if self._history is not None:
+                record, step = self._history.record, self.step
+                for key, value in zip(keys, new_values):
+                    record(key, value, step)
+            for listener in self._listeners:
+                for change in zip(keys, old_values, new_values):
+                    listener(*change)
+
+    def apply_deltas(self, deltas: Mapping[str, int]) -> None:
+        """
+        Изменяет балансы многих имён на заданные величины одной пачкой
+
+        Аргументы:
+        deltas - словарь имя -> изменение баланса
+        """
+        balances = self._balances
+        self.update_many([(key, balances.get(key, 0) + delta) for key, delta in deltas.items()])
+
+    def update(self, other=(), /, **kwargs) -> None:
+        """
+        Пакетная версия MutableMapping.update (через update_many)
+
+        Аргументы:
+        other - словарь или последовательность пар (имя, баланс)
+        kwargs - дополнительные пары имя=баланс
+        """
+        pairs = list(other.items() if hasattr(other, 'items') else other)
+        pairs.extend(kwargs.items())
+        self.update_many(pairs)
 
     def __delitem__(self, key: str) -> None:
         """
@@ -96,6 +759,8 @@ class CasinoBalance(MutableMapping):
         Аргументы:
         key - имя игрока или гуся для удаления
         """
+        if isinstance(self._balances, ChainMap):
+            self._balances = dict(self._balances)
         del self._balances[key]
 
     def __iter__(self) -> Iterator[str]:
@@ -129,14 +794,324 @@ class CasinoBalance(MutableMapping):
         Возвращает:
         список строк с изменениями балансов
         """
+        return [BalanceLog.format(key, old, new) for key, old, new, _ in self._change_log]
+
+    def get_records(self) -> BalanceLog:
+        """
+        Возвращает:
+        столбцовый лог изменений (ключ, старое значение, новое значение, шаг)
+        """
         return self._change_log
 
+    def _require_history(self) -> BalanceHistory:
+        """
+        Возвращает индекс истории или сообщает, что он выключен
+        """
+        if self._history is None:
+            raise ValueError('История балансов не ведётся (нужен history=True)')
+        return self._history
+
+    def at(self, key: str, step: int) -> Optional[int]:
+        """
+        Возвращает баланс ключа после шага step за O(log n)
+
+        Аргументы:
+        key - имя игрока или гуся
+        step - номер шага
+
+        Возвращает:
+        баланс или None, если до этого шага баланс не устанавливался
+        """
+        return self._require_history().at(key, step)
+
+    def history(self, key: str, start: int = 0, stop: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Возвращает изменения баланса ключа на шагах от start до stop (не включая stop)
+
+        Аргументы:
+        key - имя игрока или гуся
+        start - первый шаг диапазона (по умолчанию 0)
+        stop - шаг после конца диапазона (по умолчанию до конца истории)
+
+        Возвращает:
+        список пар (шаг, баланс после изменения)
+        """
+        return self._require_history().history(key, start, stop)
+
     def __repr__(self) -> str:
         """
         Возвращает:
         строку в формате 'Casino_balance({_balances})'
         """
-        return f'Casino_balance({self._balances})'
+        return f'Casino_balance({dict(self._balances)})'
+
+    def fork(self, n: int = 1) -> List['CasinoBalance']:
+        """
+        Создаёт n веток балансов с копированием при записи.
+        Текущие балансы один раз копируются в общую неизменяемую основу, каждая ветка
+        пишет только в свой слой изменений, а сам исходный объект остаётся обычным
+        словарём. Лог и история ветки разделяют с исходным все изменения до момента ответвления
+
+        Аргументы:
+        n - количество веток (по умолчанию 1)
+
+        Возвращает:
+        список новых CasinoBalance
+        """
+        base = dict(self._balances)
+        log = self._change_log
+        histories = self._history.branches(n) if self._history is not None else [None] * n
+        children = []
+        for history in histories:
+            child = CasinoBalance(log.mode, log.capacity, log.every, False)
+            child._balances = ChainMap({}, base)
+            child._change_log = log.fork()
+            child._history = history
+            child.step = self.step
+            children.append(child)
+        return children
+
+
+class StepResult:
+    """
+    Результат одного события казино.
+    Хранит только данные события, текст собирается лишь при вызове str()
+
+    Атрибуты:
+    event - имя события (метода казино)
+    outcome - исход события (ключ шаблона текста)
+    actor - имя действующего лица (игрока или гуся)
+    target - имя цели события
+    amount - сумма события (ставка, урон, кража, номинал фишки и т.п.)
+    before - баланс до события
+    after - баланс после события
+    extra - дополнительное значение (выигрыш, число разбогатевших, номинал объединения)
+    templates - тексты исходов события-плагина (исход -> шаблон) из его EventSpec
+    или None - тогда текст берётся из TEMPLATES встроенных событий
+    """
+
+    __slots__ = ('event', 'outcome', 'actor', 'target', 'amount', 'before', 'after', 'extra', 'templates')
+
+    SKIPPED_TEMPLATE = 'Событие {event} пропущено: не выполнены предусловия'
+
+    TEMPLATES = {
+        ('players_bet', 'no_players'): 'Никто не может сделать ставку',
+        ('players_bet', 'win'): '{actor} ставит {amount} и выигрывает {extra}!',
+        ('players_bet', 'lose'): '{actor} ставит {amount} и проигрывает.',
+        ('players_bet', 'fail'): '{actor} не может поставить {amount} (баланс = {before})',
+        ('geese_attack', 'no_participants'): 'Нет гусей или игроков. Атака не удалась.',
+        ('geese_attack', 'no_war_geese'): 'Нет военных гусей. Атака не удалась.',
+        ('geese_attack', 'attack'): '{actor} атакует {target}! Баланс игрока уменьшен на {amount}'
+                                    '(было: {before}, стало: {after})',
+        ('goose_honk', 'no_participants'): 'Нет гусей или игроков. Атака не удалась.',
+        ('goose_honk', 'honk'): '{actor} кричит с громкостью {amount}!',
+        ('goose_honk', 'super_honk'): '{actor} издает особый крик! {extra} игроков получили по {amount} монет.',
+        ('goose_steal', 'no_participants'): 'Нет гусей или игроков. Атака не удалась.',
+        ('goose_steal', 'no_rich'): '{actor} пытался украсть, но все игроки бомжуют.',
+        ('goose_steal', 'steal'): '{actor} украл {amount} у {target} (баланс {after}).',
+        ('player_panic', 'no_players'): 'Нет игроков для паники.',
+        ('player_panic', 'no_rich'): 'Все игроки приняли антидепрессанты после проигрыша всех своих денег. '
+                                     'Паники не будет :(',
+        ('player_panic', 'panic'): '{actor} паникует и теряет все {amount}!',
+        ('create_chip', 'chip'): 'Создана фишка Chip(value={amount})',
+        ('create_chip', 'merge'): 'Создана фишка Chip(value={amount}), объединена с одной из предыдущих: '
+                                  'Chip(value={extra})',
+        ('goose_gang', 'too_few'): 'Гусей слишком мало, они не могут объединиться в стаю',
+        ('goose_gang', 'gang'): '{actor} и {target} объединились в стаю: GooseFlock({actor}, {target})!',
+    }
+
+    def __init__(self, event: str, outcome: str, actor: str | None = None, target: str | None = None,
+                 amount: int = 0, before: int = 0, after: int = 0, extra: int = 0,
+                 templates: Optional[Dict[str, str]] = None):
+        """
+        Инициализация результата события
+
+        Аргументы:
+        event - имя события
+        outcome - исход события
+        actor - имя действующего лица
+        target - имя цели
+        amount - сумма события
+        before - баланс до события
+        after - баланс после события
+        extra - дополнительное значение
+        templates - тексты исходов события (по умолчанию TEMPLATES)
+        """
+        self.event = event
+        self.outcome = outcome
+        self.actor = actor
+        self.target = target
+        self.amount = amount
+        self.before = before
+        self.after = after
+        self.extra = extra
+        self.templates = templates
+
+    def __str__(self) -> str:
+        """
+        Возвращает:
+        текстовое описание события
+        """
+        template = self.templates.get(self.outcome) if self.templates is not None else None
+        if template is None:
+            template = self.TEMPLATES.get((self.event, self.outcome))
+        if template is None:
+            template = self.SKIPPED_TEMPLATE if self.outcome == 'skipped' else self.TEMPLATES[self.event, self.outcome]
+        return template.format(
+            event=self.event, actor=self.actor, target=self.target, amount=self.amount,
+            before=self.before, after=self.after, extra=self.extra)
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'StepResult(event={event}, outcome={outcome}, actor={actor}, amount={amount})'
+        """
+        return (f'StepResult(event={self.event}, outcome={self.outcome}, '
+                f'actor={self.actor}, amount={self.amount})')
+
+
+class EventStats:
+    """
+    Счётчики профилирования одного события казино
+
+    Атрибуты:
+    name - имя события
+    calls - количество вызовов
+    total_ns - суммарное время выполнения (нс)
+    alloc_bytes - суммарный прирост памяти по tracemalloc (байт, если он включён)
+    _samples - последние MAX_SAMPLES замеров времени (кольцевой буфер) для перцентилей
+
+    Методы:
+    add - добавляет замер
+    percentile - перцентиль времени выполнения
+    as_dict - счётчики в виде словаря
+    """
+
+    __slots__ = ('name', 'calls', 'total_ns', 'alloc_bytes', '_samples')
+
+    MAX_SAMPLES = 10000
+
+    def __init__(self, name: str):
+        """
+        Инициализация пустых счётчиков
+
+        Аргументы:
+        name - имя события
+        """
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self.alloc_bytes = 0
+        self._samples = array('q')
+
+    def add(self, elapsed_ns: int, alloc_bytes: int = 0) -> None:
+        """
+        Добавляет замер одного вызова
+
+        Аргументы:
+        elapsed_ns - время выполнения (нс)
+        alloc_bytes - прирост памяти (байт)
+        """
+        if len(self._samples) < self.MAX_SAMPLES:
+            self._samples.append(elapsed_ns)
+        else:
+            self._samples[self.calls % self.MAX_SAMPLES] = elapsed_ns
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.alloc_bytes += alloc_bytes
+
+    def percentile(self, q: float) -> int:
+        """
+        Возвращает перцентиль времени выполнения по последним замерам
+
+        Аргументы:
+        q - уровень от 0 до 1 (например 0.99)
+
+        Возвращает:
+        время в наносекундах (0, если замеров нет)
+        """
+        if not self._samples:
+            return 0
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, max(0, math.ceil(len(samples) * q) - 1))]
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Возвращает:
+        словарь calls, total_ns, p50_ns, p99_ns, alloc_bytes
+        """
+        return {'calls': self.calls, 'total_ns': self.total_ns, 'p50_ns': self.percentile(0.5),
+                'p99_ns': self.percentile(0.99), 'alloc_bytes': self.alloc_bytes}
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'EventStats({name}, calls={calls})'
+        """
+        return f'EventStats({self.name}, calls={self.calls})'
+
+
+class EventSpec:
+    """
+    Описание события казино для реестра событий
+
+    Атрибуты:
+    name - имя события
+    requires - словарь предусловие из Casino.PRECONDITIONS -> исход результата-пустышки.
+    Если предусловие ложно, событие не вызывается, а шаг возвращает StepResult(name, исход)
+    (другое событие не выбирается, поэтому последовательность случайных чисел не меняется)
+    handler - функция handler(casino) -> StepResult или None для встроенных событий
+    (тогда вызывается метод казино с именем name)
+    vectorized - функция vectorized(casino, n) -> список из n StepResult, выполняющая
+    n подряд выпавших событий за один вызов, или None
+    templates - тексты результатов события: исход -> шаблон. Хранятся в описании
+    события и передаются его результатам (общий StepResult.TEMPLATES не меняется,
+    поэтому одинаковые имена плагинов в разных казино не конфликтуют)
+    """
+
+    __slots__ = ('name', 'requires', 'handler', 'vectorized', 'templates')
+
+    def __init__(self, name: str, requires: Iterable[str] | Mapping[str, str] = (), handler=None,
+                 vectorized=None, templates: Optional[Dict[str, str]] = None):
+        """
+        Инициализация описания события
+
+        Аргументы:
+        name - имя события
+        requires - имена предусловий (исход пустышки - skipped)
+        или словарь предусловие -> исход пустышки
+        handler - обработчик события (None для встроенных)
+        vectorized - пакетный вариант обработчика
+        templates - тексты результатов события
+        """
+        self.name = name
+        self.requires = dict(requires) if isinstance(requires, Mapping) else dict.fromkeys(requires, 'skipped')
+        self.handler = handler
+        self.vectorized = vectorized
+        self.templates = dict(templates or {})
+
+    def __getstate__(self) -> Tuple:
+        """
+        Возвращает:
+        состояние для pickle (у классов со __slots__ нет __dict__)
+        """
+        return self.name, self.requires, self.handler, self.vectorized, self.templates
+
+    def __setstate__(self, state: Tuple) -> None:
+        """
+        Восстанавливает состояние из pickle
+
+        Аргументы:
+        state - кортеж из __getstate__
+        """
+        self.name, self.requires, self.handler, self.vectorized, self.templates = state
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'EventSpec({name}, requires={requires})'
+        """
+        return f'EventSpec({self.name}, requires={tuple(self.requires)})'
 
 
 class Casino:
@@ -147,13 +1122,23 @@ class Casino:
     Атрибуты:
     players - коллекция игроков
     geese - коллекция гусей
+    _geese_by_type - индексы гусей по классам: WarGoose, HonkGoose и Goose (обычные)
+    _goose_slots - словарь id(гуся) -> (класс индекса, позиция в индексе)
     balance - балансы игроков
     goose_income - доходы гусей
-    chips - созданные фишки
+    chips - пул созданных фишок (ChipPool)
+    step_count - количество выполненных шагов
+    rng - собственный генератор случайных чисел казино
+    event_weights - веса событий (имя события -> вес)
+    events - реестр событий (имя события -> EventSpec)
 
     Методы:
     register_player - регистрирует игрока
+    register_players - регистрирует нескольких игроков
     register_geese - регистрирует гуся
+    unregister_player - удаляет игрока
+    unregister_goose - удаляет гуся
+    geese_of_type - гуси одного класса из индекса
     players_bet - игрок делает ставку
     geese_attack - гусь атакует
     goose_honk - гусиный honk)
@@ -161,18 +1146,297 @@ class Casino:
     player_panic - игрок паникует
     create_chip - создается фишка
     goose_gang - гуси объединяются в группу
+    set_event_weights - меняет веса событий
+    register_event - добавляет событие-плагин
     step - выполнение случайной функции
+    step_many - выполнение нескольких случайных функций
+    enable_profiling - включает профилирование событий
+    disable_profiling - выключает профилирование событий
+    stats - счётчики профилирования событий
+    snapshot - сохраняет состояние казино в байты
+    restore - восстанавливает казино из байтов
     """
 
-    def __init__(self):
+    SNAPSHOT_VERSION = 1
+
+    EVENT_WEIGHTS = {
+        'players_bet': 0.2,
+        'geese_attack': 0.15,
+        'goose_honk': 0.15,
+        'goose_steal': 0.15,
+        'player_panic': 0.1,
+        'create_chip': 0.15,
+        'goose_gang': 0.1,
+    }
+
+    GOOSE_TYPES = (src.We_need_one_more_goose.WarGoose, src.We_need_one_more_goose.HonkGoose,
+                   src.We_need_one_more_goose.Goose)
+
+    PRECONDITIONS = {
+        'players': lambda casino: len(casino.players) > 0,
+        'solvent_players': lambda casino: casino.players.count_with_balance() > 0,
+        'geese': lambda casino: len(casino.geese) > 0,
+        'two_geese': lambda casino: len(casino.geese) >= 2,
+        'war_geese': lambda casino: len(casino.geese_of_type(src.We_need_one_more_goose.WarGoose)) > 0,
+    }
+
+    EVENT_REQUIRES = {
+        'players_bet': {'solvent_players': 'no_players'},
+        'geese_attack': {'geese': 'no_participants', 'players': 'no_participants', 'war_geese': 'no_war_geese'},
+        'goose_honk': {'geese': 'no_participants', 'players': 'no_participants'},
+        'goose_steal': {'geese': 'no_participants', 'players': 'no_participants'},
+        'player_panic': {'players': 'no_players', 'solvent_players': 'no_rich'},
+        'create_chip': {},
+        'goose_gang': {'two_geese': 'too_few'},
+    }
+
+    def __init__(self, log_mode: str = 'full', log_capacity: int = 0, log_every: int = 1,
+                 rng: random.Random | None = None, chip_capacity: int = 2,
+                 players: src.Players.PlayerStore | None = None, history: bool = False):
         """
         инициализация казино с коллекциями игроков и гусей, а также их балансов
+
+        Аргументы:
+        log_mode - режим хранения логов балансов: full, ring, sample или off (по умолчанию full)
+        log_capacity - размер кольцевого буфера для режима ring
+        log_every - шаг выборки для режима sample
+        rng - генератор случайных чисел (по умолчанию новый random.Random(),
+        общее состояние модуля random не используется)
+        chip_capacity - количество фишек, после которого новые фишки объединяются (по умолчанию 2)
+        players - коллекция для игроков: PlayerCollection (по умолчанию)
+        или ArrayPlayerCollection для больших казино
+        history - вести индекс истории балансов и доходов для at и history (по умолчанию нет)
         """
-        self.players = src.Players.PlayerCollection()
+        self.rng = rng if rng is not None else random.Random()
+        self.players: src.Players.PlayerStore = players if players is not None else src.Players.PlayerCollection()
         self.geese = src.Players.PlayerCollection()
-        self.balance = CasinoBalance()
-        self.goose_income = CasinoBalance()
-        self.chips: List[Chip] = []
+        self._geese_by_type: Dict[type, List[src.We_need_one_more_goose.Goose]] = {
+            cls: [] for cls in self.GOOSE_TYPES}
+        self._goose_slots: Dict[int, Tuple[type, int]] = {}
+        self.balance = CasinoBalance(log_mode, log_capacity, log_every, history)
+        self.goose_income = CasinoBalance(log_mode, log_capacity, log_every, history)
+        self.chips = ChipPool(capacity=chip_capacity)
+        self.step_count = 0
+        self.event_weights: Dict[str, float] = dict(self.EVENT_WEIGHTS)
+        self.events: Dict[str, EventSpec] = {name: EventSpec(name, self.EVENT_REQUIRES[name])
+                                             for name in self.EVENT_WEIGHTS}
+        self._profiling = False
+        self._trace_alloc = False
+        self._started_tracemalloc = False
+        self._event_stats: Dict[str, EventStats] = {}
+        self._build_events()
+
+    def _build_events(self) -> None:
+        """
+        Строит таблицу событий и накопленные веса (один раз, а не на каждом шаге),
+        а также таблицу пакетных вариантов по вызываемым объектам событий.
+        Встроенные события проверяют свои предусловия сами, первой веткой метода
+        (за O(1) по индексам, без случайных чисел), и возвращают ту же пустышку,
+        что описана в EVENT_REQUIRES, поэтому step вызывает их напрямую.
+        Плагины с предусловиями оборачиваются проверкой (см. _plugin_event).
+        При включённом профилировании события оборачиваются замером времени,
+        без него step ничего не платит за профилирование
+        """
+        self._events = []
+        self._vectorized = {}
+        for name in self.event_weights:
+            spec = self.events[name]
+            if spec.handler is None:
+                event, vectorized = getattr(self, name), None
+            else:
+                event, vectorized = self._plugin_event(spec)
+            if self._profiling:
+                event = self._profiled(name, event)
+            self._events.append(event)
+            if vectorized is not None:
+                self._vectorized[event] = vectorized
+        self._cum_weights = list(accumulate(self.event_weights.values()))
+
+    def register_event(self, name: str, handler, weight: float,
+                       requires: Iterable[str] | Mapping[str, str] = (),
+                       vectorized=None, templates: Optional[Dict[str, str]] = None) -> None:
+        """
+        Добавляет событие-плагин в реестр казино. Для snapshot и restore обработчики
+        должны быть функциями уровня модуля (их сохраняет pickle)
+
+        Аргументы:
+        name - имя события (не должно совпадать с уже зарегистрированными)
+        handler - функция handler(casino) -> StepResult
+        weight - вес события (неотрицательное число)
+        requires - имена предусловий из PRECONDITIONS или словарь предусловие -> исход
+        пустышки, которую шаг вернёт вместо вызова обработчика (по умолчанию skipped)
+        vectorized - функция vectorized(casino, n) -> список из n StepResult (необязательно)
+        templates - тексты результатов: исход -> шаблон StepResult
+        """
+        if name in self.events:
+            raise ValueError(f'Событие {name} уже зарегистрировано')
+        self._add_event(EventSpec(name, requires, handler, vectorized, templates), weight)
+
+    def _add_event(self, spec: EventSpec, weight: float) -> None:
+        """
+        Проверяет и добавляет описание события в реестр
+
+        Аргументы:
+        spec - описание события
+        weight - вес события
+        """
+        unknown = [req for req in spec.requires if req not in self.PRECONDITIONS]
+        if unknown:
+            raise ValueError(f'Неизвестные предусловия события {spec.name}: {", ".join(unknown)}')
+        if weight < 0:
+            raise ValueError(f'Вес события {spec.name} не может быть отрицательным')
+        self.events[spec.name] = spec
+        self.event_weights[spec.name] = weight
+        self._build_events()
+
+    def _plugin_event(self, spec: EventSpec) -> Tuple:
+        """
+        Собирает вызываемые объекты события-плагина. Результатам плагина передаются
+        тексты из его описания (spec.templates). Если у плагина есть предусловия,
+        они проверяются перед вызовом: при ложном предусловии обработчик не вызывается,
+        а возвращается пустышка StepResult(имя, исход). Пакетный вариант проверяет
+        предусловия один раз на серию (пропуск не меняет состояние казино,
+        поэтому вся серия пропускается целиком)
+
+        Аргументы:
+        spec - описание события
+
+        Возвращает:
+        пару (событие без аргументов, пакетный вариант от n или None)
+        """
+        name, templates = spec.name, spec.templates
+        plugin_handler, plugin_vectorized = spec.handler, spec.vectorized
+
+        def handler() -> 'StepResult':
+            result = plugin_handler(self)
+            result.templates = templates
+            return result
+
+        def batch(n: int) -> List['StepResult']:
+            results = plugin_vectorized(self, n)
+            for result in results:
+                result.templates = templates
+            return results
+
+        vectorized = batch if plugin_vectorized is not None else None
+        if not spec.requires:
+            return handler, vectorized
+
+        checks = [(self.PRECONDITIONS[req], outcome) for req, outcome in spec.requires.items()]
+
+        def skipped() -> Optional[str]:
+            for check, outcome in checks:
+                if not check(self):
+                    return outcome
+            return None
+
+        def run() -> 'StepResult':
+            outcome = skipped()
+            return handler() if outcome is None else StepResult(name, outcome, templates=templates)
+
+        def run_many(n: int) -> List['StepResult']:
+            outcome = skipped()
+            if outcome is None:
+                return vectorized(n)
+            return [StepResult(name, outcome, templates=templates) for _ in range(n)]
+
+        return run, (run_many if vectorized is not None else None)
+
+    def set_event_weights(self, weights: Dict[str, float]) -> None:
+        """
+        Меняет веса событий. Не указанные события сохраняют прежний вес
+
+        Аргументы:
+        weights - словарь имя события -> новый вес (неотрицательное число)
+        """
+        for name, weight in weights.items():
+            if name not in self.event_weights:
+                raise ValueError(f'Неизвестное событие: {name}')
+            if weight < 0:
+                raise ValueError(f'Вес события {name} не может быть отрицательным')
+        new_weights = {**self.event_weights, **weights}
+        if sum(new_weights.values()) <= 0:
+            raise ValueError('Сумма весов событий должна быть положительной')
+        self.event_weights = new_weights
+        self._build_events()
+
+    def _profiled(self, name: str, event):
+        """
+        Оборачивает событие замером времени (и памяти, если включён tracemalloc)
+
+        Аргументы:
+        name - имя события
+        event - метод события
+
+        Возвращает:
+        функцию, вызывающую событие и записывающую замер в EventStats
+        """
+        stats = self._event_stats.get(name)
+        if stats is None:
+            stats = self._event_stats[name] = EventStats(name)
+        clock = time.perf_counter_ns
+
+        if self._trace_alloc:
+            traced = tracemalloc.get_traced_memory
+
+            def run() -> 'StepResult':
+                before = traced()[0]
+                start = clock()
+                result = event()
+                stats.add(clock() - start, traced()[0] - before)
+                return result
+        else:
+            def run() -> 'StepResult':
+                start = clock()
+                result = event()
+                stats.add(clock() - start)
+                return result
+        return run
+
+    def enable_profiling(self, trace_alloc: bool = False) -> None:
+        """
+        Включает профилирование событий, выполняемых через step и step_many,
+        и сбрасывает накопленные счётчики
+
+        Аргументы:
+        trace_alloc - считать прирост памяти событий через tracemalloc
+        (заметно замедляет симуляцию)
+        """
+        self.disable_profiling()
+        self._event_stats = {}
+        self._profiling = True
+        self._trace_alloc = trace_alloc
+        if trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._build_events()
+
+    def disable_profiling(self) -> None:
+        """
+        Выключает профилирование событий. Накопленные счётчики сохраняются
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if self._profiling:
+            self._profiling = False
+            self._trace_alloc = False
+            self._build_events()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Возвращает:
+        словарь имя события -> {calls, total_ns, p50_ns, p99_ns, alloc_bytes}
+        (пустой, если профилирование не включалось)
+        """
+        return {name: stats.as_dict() for name, stats in self._event_stats.items()}
+
+    def _next_step(self) -> None:
+        """
+        Увеличивает счётчик шагов и помечает им логи балансов
+        """
+        self.step_count += 1
+        self.balance.step = self.goose_income.step = self.step_count
 
     def register_player(self, player: src.Players.Player) -> None:
         """
@@ -181,8 +1445,18 @@ class Casino:
         Аргументы:
         player - объект для регистрации
         """
-        self.players.append(player)
-        self.balance[player.name] = player.balance
+        self.register_players([player])
+
+    def register_players(self, players: Iterable[src.Players.Player]) -> None:
+        """
+        Регистрирует нескольких игроков, записывая их балансы одной пачкой
+
+        Аргументы:
+        players - объекты игроков для регистрации
+        """
+        players = list(players)
+        self.players.extend(players)
+        self.balance.update_many([(player.name, player.balance) for player in players])
 
     def register_geese(self, goose: src.We_need_one_more_goose.Goose) -> None:
         """
@@ -192,55 +1466,141 @@ class Casino:
         goose - гусиный объект для регистрации
         """
         self.geese.append(goose)
+        self._index_goose(goose)
         self.goose_income[goose.name] = 0
 
-    def players_bet(self) -> str:
+    def unregister_player(self, player: src.Players.Player | str) -> None:
+        """
+        Удаляет игрока из казино за O(1) (обменом с последним игроком коллекции).
+        Индекс имён и множество платёжеспособных игроков обновляет коллекция,
+        баланс удаляется, если в казино не осталось игроков с этим именем
+
+        Аргументы:
+        player - игрок из коллекции казино или его имя
+        """
+        if isinstance(player, str):
+            found = self.players.find_by_name(player)
+            if found is None:
+                raise ValueError(f'Игрок {player} не зарегистрирован')
+            target = found
+        else:
+            target = player
+        name = target.name
+        self.players.swap_remove(target)
+        if self.players.find_by_name(name) is None and name in self.balance:
+            del self.balance[name]
+
+    def unregister_goose(self, goose: src.We_need_one_more_goose.Goose | str) -> None:
+        """
+        Удаляет гуся из казино за O(1): из коллекции гусей и из индекса его класса.
+        Доход удаляется, если в казино не осталось гусей с этим именем
+
+        Аргументы:
+        goose - гусь или его имя
+        """
+        if isinstance(goose, str):
+            found = self.geese.find_by_name(goose)
+            if not isinstance(found, src.We_need_one_more_goose.Goose):
+                raise ValueError(f'Гусь {goose} не зарегистрирован')
+            target = found
+        else:
+            target = goose
+        self.geese.swap_remove(target)
+        if target not in self.geese:
+            self._unindex_goose(target)
+        if self.geese.find_by_name(target.name) is None and target.name in self.goose_income:
+            del self.goose_income[target.name]
+
+    def _index_goose(self, goose: src.We_need_one_more_goose.Goose) -> None:
+        """
+        Добавляет гуся в индекс его класса (класс определяется один раз, при регистрации)
+
+        Аргументы:
+        goose - гусь
+        """
+        if id(goose) in self._goose_slots:
+            return
+        cls = next(cls for cls in self.GOOSE_TYPES if isinstance(goose, cls))
+        index = self._geese_by_type[cls]
+        self._goose_slots[id(goose)] = (cls, len(index))
+        index.append(goose)
+
+    def _unindex_goose(self, goose: src.We_need_one_more_goose.Goose) -> None:
+        """
+        Удаляет гуся из индекса его класса за O(1): на его место ставится последний гусь индекса
+
+        Аргументы:
+        goose - гусь
+        """
+        slot = self._goose_slots.pop(id(goose), None)
+        if slot is None:
+            return
+        cls, pos = slot
+        index = self._geese_by_type[cls]
+        last = index.pop()
+        if last is not goose:
+            index[pos] = last
+            self._goose_slots[id(last)] = (cls, pos)
+
+    def geese_of_type(self, cls: type) -> List[src.We_need_one_more_goose.Goose]:
+        """
+        Возвращает индекс гусей одного класса (без копирования, изменять его нельзя)
+
+        Аргументы:
+        cls - WarGoose, HonkGoose или Goose (только обычные гуси)
+
+        Возвращает:
+        список гусей этого класса
+        """
+        return self._geese_by_type[cls]
+
+    def players_bet(self) -> 'StepResult':
         """
         Случайный игрок делает ставку и с шансом 33 процента утраивает ставку
 
         Возвращает:
-        описание результатов ставки
+        результат ставки
         """
-        rich_players = self.players.get_players_with_balance()
-        if not rich_players:
-            return 'Никто не может сделать ставку'
-        player = random.choice(rich_players)
-        bet = random.randint(1, min(100, player.balance))
+        player = self.players.random_with_balance(self.rng)
+        if player is None:
+            return StepResult('players_bet', 'no_players')
+        bet = self.rng.randint(1, min(100, player.balance))
+        before = player.balance
 
         if player.bet(bet):
             self.balance[player.name] = player.balance
-            check = random.random()
+            check = self.rng.random()
 #            if check > 0.67 or 1: # Ошибка 2: or 1 делает условие всегда истинно
             if check > 0.67:
                 win = bet * 3
                 player.win(win)
                 self.balance[player.name] = player.balance
-                return f'{player.name} ставит {bet} и выигрывает {win}!'
-            return f'{player.name} ставит {bet} и проигрывает.'
-        return f"{player.name} не может поставить {bet} (баланс = {player.balance})"
+                return StepResult('players_bet', 'win', player.name, None, bet, before, player.balance, win)
+            return StepResult('players_bet', 'lose', player.name, None, bet, before, player.balance)
+        return StepResult('players_bet', 'fail', player.name, None, bet, before, before)
 
-    def geese_attack(self) -> str:
+    def geese_attack(self) -> 'StepResult':
         """
         случайный боевой гусь атакует случайного игрока в казино
 
         Возвращает:
-        описание результатов атаки
+        результат атаки
         """
         if not self.geese or not self.players:
-            return 'Нет гусей или игроков. Атака не удалась.'
-        war_geese = [goose for goose in self.geese if isinstance(goose, src.We_need_one_more_goose.WarGoose)]
+            return StepResult('geese_attack', 'no_participants')
+        war_geese = self._geese_by_type[src.We_need_one_more_goose.WarGoose]
         if not war_geese:
-            return 'Нет военных гусей. Атака не удалась.'
+            return StepResult('geese_attack', 'no_war_geese')
 
-        goose = random.choice(war_geese)
-        player = random.choice(self.players)
+        goose = self.rng.choice(war_geese)
+        player = self.rng.choice(self.players)
         old_balance = player.balance
-        res = goose.attack(player)
+        dmg = goose.hit(player, self.rng)
         self.balance[player.name] = player.balance
 
-        return res + f'(было: {old_balance}, стало: {player.balance})'
+        return StepResult('geese_attack', 'attack', goose.name, player.name, dmg, old_balance, player.balance)
 
-    def goose_honk(self) -> str:
+    def goose_honk(self) -> 'StepResult':
         """
         Гуси гудят. А супер-гуси используют свою способность (SuperHonk)
 
@@ -248,75 +1608,75 @@ class Casino:
         результат гусиного пения
         """
         if not self.geese or not self.players:
-            return 'Нет гусей или игроков. Атака не удалась.'
-        goose = random.choice(self.geese)
+            return StepResult('goose_honk', 'no_participants')
+        goose = self.rng.choice(self.geese)
         if isinstance(goose, src.We_need_one_more_goose.HonkGoose):
-            return goose.super_honk(self)
-        return goose.honk()
+            winners = goose.honk_players(self, self.rng)
+            return StepResult('goose_honk', 'super_honk', goose.name, None, goose.honk_power, extra=winners)
+        return StepResult('goose_honk', 'honk', goose.name, None, goose.honk_volume)
 
-    def goose_steal(self) -> str:
+    def goose_steal(self) -> 'StepResult':
         """
         гусиный ниндзя ворует у случайного игрока деньги
 
         Возвращает:
-        описание кражи
+        результат кражи
         """
         if not self.geese or not self.players:
-            return 'Нет гусей или игроков. Атака не удалась.'
+            return StepResult('goose_steal', 'no_participants')
 
-        goose = random.choice(self.geese)
-        rich_players = self.players.get_players_with_balance()
+        goose = self.rng.choice(self.geese)
+        player = self.players.random_with_balance(self.rng)
 
-        if not rich_players:
-            return f"{goose.name} пытался украсть, но все игроки бомжуют."
+        if player is None:
+            return StepResult('goose_steal', 'no_rich', goose.name)
 
-        player = random.choice(rich_players)
-        steal = random.randint(1, min(10, player.balance))
+        steal = self.rng.randint(1, min(10, player.balance))
+        before = player.balance
         player.balance -= steal
         self.balance[player.name] = player.balance
 
         current_income = self.goose_income.get(goose.name, 0)
         self.goose_income[goose.name] = current_income + steal
 
-        return f"{goose.name} украл {steal} у {player.name} (баланс {player.balance})."
+        return StepResult('goose_steal', 'steal', goose.name, player.name, steal, before, player.balance)
 
-    def player_panic(self) -> str:
+    def player_panic(self) -> 'StepResult':
         """
         Случайный игрок паникует и теряет все деньги
 
         Возвращает:
-        описание паники
+        результат паники
         """
         if not self.players:
-            return 'Нет игроков для паники.'
+            return StepResult('player_panic', 'no_players')
 
-        rich_players = self.players.get_players_with_balance()
-        if not rich_players:
-            return 'Все игроки приняли антидепрессанты после проигрыша всех своих денег. Паники не будет :('
-        player = random.choice(rich_players)
+        player = self.players.random_with_balance(self.rng)
+        if player is None:
+            return StepResult('player_panic', 'no_rich')
         lost = player.balance
         player.balance = 0
         self.balance[player.name] = 0
 
-        return f'{player.name} паникует и теряет все {lost}!'
+        return StepResult('player_panic', 'panic', player.name, None, lost, lost, 0)
 
-    def create_chip(self) -> str:
+    def create_chip(self) -> 'StepResult':
         """
-        Создается новая фишка. Если существует более 2 фишек, то 2 случайных фишки объединяются
+        Создается новая фишка. Если в пуле уже достаточно фишек, новая фишка
+        объединяется со случайной фишкой пула
 
         Возвращает:
-        описание созданной фишки
+        результат создания фишки (amount - номинал, extra - номинал объединения)
         """
-        value = random.randint(1, 100)
-        chip = Chip(value)
-        self.chips.append(chip)
+        value = self.rng.randint(1, 100)
 
-        if len(self.chips) > 2:
-            combination = random.choice(self.chips) + random.choice(self.chips)
-            return f'Создана фишка {chip}, объединена с одной из предыдущих: {combination}'
-        return f'Создана фишка {chip}'
+        if len(self.chips) >= self.chips.capacity:
+            _, merged = self.chips.merge_in(value, self.rng)
+            return StepResult('create_chip', 'merge', amount=value, extra=merged)
+        self.chips.add(value)
+        return StepResult('create_chip', 'chip', amount=value)
 
-    def goose_gang(self) -> str:
+    def goose_gang(self) -> 'StepResult':
         """
         Гуси объединяются в ОПГ
 
@@ -324,29 +1684,166 @@ class Casino:
         результат объединения гусей
         """
         if len(self.geese) < 2:
-            return 'Гусей слишком мало, они не могут объединиться в стаю'
-        goose1, goose2 = random.sample(list(self.geese), 2)
-        flock = goose1 + goose2
-        return f'{goose1.name} и {goose2.name} объединились в стаю: {flock}!'
+            return StepResult('goose_gang', 'too_few')
+        goose1, goose2 = self.rng.sample(list(self.geese), 2)
+        return StepResult('goose_gang', 'gang', goose1.name, goose2.name)
 
-    def step(self) -> str:
+    def step(self) -> 'StepResult':
         """
-        Выполняет одно случайное событие с заданной вероятностью
+        Выполняет одно случайное событие с заданной вероятностью.
+        Если предусловия выпавшего события не выполнены, шаг возвращает его пустышку
+        (например, 'Никто не может сделать ставку'), другое событие не выбирается
 
         Возвращает:
         результат выполненного события
         """
-        events = [
-            self.players_bet,
-            self.geese_attack,
-            self.goose_honk,
-            self.goose_steal,
-            self.player_panic,
-            self.create_chip,
-            self.goose_gang
-        ]
-        weights = [0.2, 0.15, 0.15, 0.15, 0.1, 0.15, 0.1]
-        return random.choices(events, weights=weights, k=1)[0]()
+        self._next_step()
+        return self.rng.choices(self._events, cum_weights=self._cum_weights, k=1)[0]()
+
+    def step_many(self, n: int) -> List['StepResult']:
+        """
+        Выполняет n случайных событий. Все события выбираются одним вызовом,
+        поэтому последовательность случайных чисел отличается от n вызовов step.
+        Несколько подряд выпавших одинаковых событий с пакетным вариантом выполняются
+        одним его вызовом, изменения балансов помечаются последним шагом серии
+
+        Аргументы:
+        n - количество шагов
+
+        Возвращает:
+        список результатов выполненных событий
+        """
+        results = []
+        events = self.rng.choices(self._events, cum_weights=self._cum_weights, k=n)
+        i = 0
+        while i < n:
+            event = events[i]
+            vectorized = self._vectorized.get(event)
+            run = 1
+            if vectorized is not None:
+                while i + run < n and events[i + run] == event:
+                    run += 1
+                self.step_count += run - 1
+                self._next_step()
+                results.extend(vectorized(run))
+            else:
+                self._next_step()
+                results.append(event())
+            i += run
+        return results
+
+    def snapshot(self) -> bytes:
+        """
+        Сохраняет полное состояние казино: игроков (вместе с порядком выбора
+        платёжеспособных), гусей, балансы с логами, фишки, состояние генератора случайных чисел, счётчик шагов и веса событий.
+        Формат - сжатый zlib pickle, загружать стоит только свои снимки
+
+        Возвращает:
+        снимок состояния в виде байтов
+        """
+        state = {
+            'version': self.SNAPSHOT_VERSION,
+            'players_backend': type(self.players).__name__,
+            'players': [(player.name, player.balance) for player in self.players],
+            'solvent_order': self.players.solvent_order(),
+            'geese': list(self.geese),
+            'balance': self.balance,
+            'goose_income': self.goose_income,
+            'chips': self.chips,
+            'rng_state': self.rng.getstate(),
+            'step_count': self.step_count,
+            'event_weights': self.event_weights,
+            'plugins': [spec for spec in self.events.values() if spec.handler is not None],
+        }
+        return zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def restore(cls, data: bytes) -> 'Casino':
+        """
+        Восстанавливает казино из снимка. Восстановленное казино получает
+        собственный random.Random с сохранённым состоянием
+
+        Аргументы:
+        data - снимок, полученный из snapshot
+
+        Возвращает:
+        новое казино в том же состоянии
+        """
+        state = pickle.loads(zlib.decompress(data))
+        if state.get('version') != cls.SNAPSHOT_VERSION:
+            raise ValueError(f'Неподдерживаемая версия снимка: {state.get("version")}')
+        backends: Dict[str, type[src.Players.PlayerStore]] = {
+            'PlayerCollection': src.Players.PlayerCollection,
+            'ArrayPlayerCollection': src.Players.ArrayPlayerCollection,
+        }
+        if state['players_backend'] not in backends:
+            raise ValueError(f'Неизвестная коллекция игроков: {state["players_backend"]}')
+
+        rng = random.Random()
+        rng.setstate(state['rng_state'])
+        chips = state['chips']
+        casino = cls(rng=rng, chip_capacity=chips.capacity, players=backends[state['players_backend']]())
+        casino.register_players(src.Players.Player(name, balance) for name, balance in state['players'])
+        if 'solvent_order' in state:
+            casino.players.set_solvent_order(state['solvent_order'])
+        for goose in state['geese']:
+            casino.register_geese(goose)
+
+        casino.balance = state['balance']
+        casino.goose_income = state['goose_income']
+        casino.chips = chips
+        casino.step_count = state['step_count']
+        for spec in state.get('plugins', ()):
+            casino._add_event(spec, state['event_weights'][spec.name])
+        casino.set_event_weights(state['event_weights'])
+        return casino
+
+    def fork(self, n: int, seeds: Optional[Iterable[int]] = None) -> List['Casino']:
+        """
+        Создаёт n веток казино из текущего состояния, каждая со своим генератором
+        random.Random(seed). Балансы и их логи разделяются с исходным казино
+        с копированием при записи, гуси общие (события их не меняют).
+        Игроки веток хранятся в ArrayPlayerCollection: балансы копируются один раз
+        в общий снимок, ветка пишет изменения в свой слой (см. ArrayPlayerCollection.branches),
+        игроки PlayerCollection переводятся в массивы один раз на весь вызов
+        с сохранением порядка _solvent, поэтому ветка с сидом s продолжает так же,
+        как исходное казино с random.Random(s)
+
+        Аргументы:
+        n - количество веток
+        seeds - сиды веток (по умолчанию 0..n-1)
+
+        Возвращает:
+        список новых казино
+        """
+        seeds = list(range(n)) if seeds is None else list(seeds)
+        if len(seeds) != n:
+            raise ValueError('Количество сидов должно совпадать с количеством веток')
+
+        players = self.players
+        if not isinstance(players, src.Players.ArrayPlayerCollection):
+            players = src.Players.ArrayPlayerCollection(players)
+            players.set_solvent_order(self.players.solvent_order())
+        balances = self.balance.fork(n)
+        incomes = self.goose_income.fork(n)
+        branches = []
+        for seed, balance, income, branch_players in zip(seeds, balances, incomes, players.branches(n)):
+            branch = Casino(rng=random.Random(seed), chip_capacity=self.chips.capacity,
+                            players=branch_players)
+            branch.geese = src.Players.PlayerCollection(list(self.geese))
+            branch._geese_by_type = {cls: list(index) for cls, index in self._geese_by_type.items()}
+            branch._goose_slots = dict(self._goose_slots)
+            branch.balance = balance
+            branch.goose_income = income
+            branch.chips = ChipPool(self.chips.values, self.chips.capacity)
+            branch.step_count = self.step_count
+            for spec in self.events.values():
+                if spec.handler is not None:
+                    branch._add_event(spec, self.event_weights[spec.name])
+            branch.set_event_weights(self.event_weights)
+            branches.append(branch)
+        return branches
+
 
 if __name__ == "__main__":
-    pass
\ No newline at end of file
+    pass
@@ -16,6 +16,8 @@ class Goose:
     _stolen_chips - количество украденных монет
     """
 
+    __slots__ = ('name', 'honk_volume', '_stolen_chips')
+
     def __init__(self, name: str, honk_volume: int):
         """
         Инициализация гуся
@@ -67,6 +69,8 @@ class WarGoose(Goose):
     power - сила атаки гуся
     """
 
+    __slots__ = ('power',)
+
     def __init__(self, name: str, honk_volume: int, power: int = 10):
         """
         Инициализация военного гуся
@@ -79,19 +83,34 @@ class WarGoose(Goose):
         super().__init__(name, honk_volume)
         self.power = power
 
-    def attack(self, player: 'src.Players.Player') -> str:
+    def hit(self, player: 'src.Players.Player', rng: random.Random) -> int:
         """
-        гусь атакует игрока, уменьшая его баланс
+        гусь атакует игрока, уменьшая его баланс (без текстового описания)
 
         Аргументы:
         player - цель для атаки
+        rng - генератор случайных чисел (например, Casino.rng)
 
         Возвращает:
-        результат атаки
+        нанесённый урон
         """
 #        dmg = random.randint(1, self.honk_volume)
-        dmg = random.randint(1, self.power)
+        dmg = rng.randint(1, self.power)
         player.balance = max(0, player.balance - dmg)
+        return dmg
+
+    def attack(self, player: 'src.Players.Player', rng: random.Random) -> str:
+        """
+        гусь атакует игрока, уменьшая его баланс
+
+        Аргументы:
+        player - цель для атаки
+        rng - генератор случайных чисел (например, Casino.rng)
+
+        Возвращает:
+        результат атаки
+        """
+        dmg = self.hit(player, rng)
         return f'{self.name} атакует {player.name}! Баланс игрока уменьшен на {dmg}'
 
     def __repr__(self) -> str:
@@ -112,6 +131,8 @@ class HonkGoose(Goose):
     honk_power - сила супер-гудения
     """
 
+    __slots__ = ('honk_power',)
+
     def __init__(self, name: str, honk_volume: int, honk_power: int = 10):
         """
         Инициализация кричащего гуся
@@ -124,27 +145,53 @@ class HonkGoose(Goose):
         super().__init__(name, honk_volume)
         self.honk_power = honk_power
 
-    def super_honk(self, casino: 'Wanna_play_kazik.Casino') -> str:
+    def super_honk(self, casino: 'Wanna_play_kazik.Casino', rng: random.Random) -> str:
         """
         Особый гусиный крик, который может принести игрокам деньги.
         Каждый игрок с шансом 50% получит honk_power монет
 
         Аргументы:
         casino - объект казино с игроками
+        rng - генератор случайных чисел (например, Casino.rng)
 
         Возвращает:
         результат этого особого крика с указанием количества разбогатевших игроков
         """
-        res = f'{self.name} издает особый крик!'
-        win = 0
+        win = self.honk_players(casino, rng)
+        return f'{self.name} издает особый крик! {win} игроков получили по {self.honk_power} монет.'
+
+    def honk_players(self, casino: 'Wanna_play_kazik.Casino', rng: random.Random) -> int:
+        """
+        Особый гусиный крик без текстового описания.
+        Каждый игрок с шансом 50% получит honk_power монет.
+        Исходы для всех игроков берутся из одного вызова getrandbits (по биту на игрока),
+        а балансы казино обновляются одной пачкой. Если коллекция игроков умеет
+        apply_delta_where (ArrayPlayerCollection), выигрыши начисляются по массиву
 
-        for player in casino.players:
-            if random.random() > 0.5:
+        Аргументы:
+        casino - объект казино с игроками
+        rng - генератор случайных чисел (например, Casino.rng)
+
+        Возвращает:
+        количество разбогатевших игроков
+        """
+        players = casino.players
+        count = len(players)
+        if not count:
+            return 0
+
+        bits = format(rng.getrandbits(count), f'0{count}b')
+        apply_delta_where = getattr(players, 'apply_delta_where', None)
+        if apply_delta_where is not None:
+            changes = apply_delta_where(self.honk_power, bits)
+        else:
+            winners = [player for player, bit in zip(players, bits) if bit == '1']
+            for player in winners:
                 player.balance += self.honk_power
-                casino.balance[player.name] = player.balance
-                win += 1
+            changes = [(player.name, player.balance) for player in winners]
+        casino.balance.update_many(changes)
 
-        return res + f' {win} игроков получили по {self.honk_power} монет.'
+        return len(changes)
 
     def __call__(self) -> str:
         """
@@ -165,6 +212,8 @@ class GooseFlock:
     geese - список объектов Goose
     """
 
+    __slots__ = ('geese',)
+
     def __init__(self, geese: list[Goose]):
         """
         Инициализация стаи
@@ -0,0 +1,272 @@
+import csv
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from src.Wanna_play_kazik import Casino, StepResult
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+COLUMNS = ('step', 'event', 'outcome', 'actor', 'target', 'amount', 'before', 'after', 'extra',
+           'ledger', 'key', 'old', 'new')
+
+FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv', '.parquet': 'parquet'}
+
+LEDGERS = ('balance', 'goose_income')
+
+
+class EventExporter:
+    """
+    Потоковая выгрузка событий казино в NDJSON, CSV или Parquet (если установлен pyarrow).
+    Каждое изменение баланса - отдельная строка вместе с данными события, событие без
+    изменений балансов - одна строка с пустыми полями ledger, key, old, new.
+    Строки копятся пачками по chunk_size и сразу пишутся на диск, поэтому память
+    не растёт с длиной симуляции
+
+    Атрибуты:
+    path - путь к файлу выгрузки
+    fmt - формат: ndjson, csv или parquet
+    chunk_size - размер пачки строк
+    rows_written - количество записанных строк
+
+    Методы:
+    write - добавляет событие шага с изменениями балансов
+    flush - записывает накопленную пачку
+    close - дописывает остаток и закрывает файл
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, chunk_size: int = 10000):
+        """
+        Инициализация выгрузки
+
+        Аргументы:
+        path - путь к файлу выгрузки
+        fmt - формат (по умолчанию определяется по расширению файла)
+        chunk_size - размер пачки строк (по умолчанию 10000)
+        """
+        if fmt is None:
+            fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt not in ('ndjson', 'csv', 'parquet'):
+            raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
+        if fmt == 'parquet' and pyarrow is None:
+            raise ImportError('Для выгрузки в Parquet нужен пакет pyarrow')
+        if chunk_size <= 0:
+            raise ValueError('Размер пачки должен быть положительным')
+
+        self.path = path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._rows: List[Tuple[Any, ...]] = []
+        self._file: Optional[TextIO] = None
+        self._csv = None
+        self._parquet = None
+
+        if fmt == 'parquet':
+            self._schema = pyarrow.schema([
+                ('step', pyarrow.int64()), ('event', pyarrow.string()), ('outcome', pyarrow.string()),
+                ('actor', pyarrow.string()), ('target', pyarrow.string()), ('amount', pyarrow.int64()),
+                ('before', pyarrow.int64()), ('after', pyarrow.int64()), ('extra', pyarrow.int64()),
+                ('ledger', pyarrow.string()), ('key', pyarrow.string()), ('old', pyarrow.int64()),
+                ('new', pyarrow.int64()),
+            ])
+            self._parquet = pyarrow.parquet.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, 'w', encoding='utf-8', newline='')
+            if fmt == 'csv':
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(COLUMNS)
+
+    def write(self, step: int, result: StepResult,
+              changes: Sequence[Tuple[str, str, int, int]] = ()) -> None:
+        """
+        Добавляет событие шага
+
+        Аргументы:
+        step - номер шага
+        result - результат события
+        changes - изменения балансов: кортежи (ledger, ключ, старое значение, новое значение),
+        где ledger - balance или goose_income
+        """
+        event = (step, result.event, result.outcome, result.actor, result.target,
+                 result.amount, result.before, result.after, result.extra)
+        if not changes:
+            self._rows.append(event + (None, None, None, None))
+        for change in changes:
+            self._rows.append(event + tuple(change))
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Записывает накопленную пачку строк на диск
+        """
+        rows = self._rows
+        if not rows:
+            return
+        if self.fmt == 'ndjson':
+            self._file.write(''.join(
+                json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows))
+        elif self.fmt == 'csv':
+            self._csv.writerows(rows)
+        else:
+            columns = list(zip(*rows))
+            table = pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+                schema=self._schema)
+            self._parquet.write_table(table)
+        self.rows_written += len(rows)
+        self._rows = []
+
+    def close(self) -> None:
+        """
+        Дописывает остаток строк и закрывает файл
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self) -> 'EventExporter':
+        """
+        Возвращает:
+        саму выгрузку (для with)
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Закрывает выгрузку при выходе из with
+        """
+        self.close()
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'EventExporter(path={path}, fmt={fmt})'
+        """
+        return f'EventExporter(path={self.path}, fmt={self.fmt})'
+
+
+class ChangeRecorder:
+    """
+    Собирает изменения балансов казино в момент записи (через слушателей CasinoBalance),
+    а не из лога, поэтому изменения не теряются при режимах лога off, sample и ring
+
+    Атрибуты:
+    changes - словарь ledger -> список (ключ, старое значение, новое значение),
+    где ledger - balance или goose_income
+
+    Методы:
+    take - возвращает накопленные изменения и очищает их
+    close - отписывается от балансов казино
+    """
+
+    def __init__(self, casino: Casino):
+        """
+        Подписывается на балансы и доходы гусей казино
+
+        Аргументы:
+        casino - казино
+        """
+        self.changes: Dict[str, List[Tuple[str, int, int]]] = {ledger: [] for ledger in LEDGERS}
+        self._subscriptions = []
+        for ledger, balance in zip(LEDGERS, (casino.balance, casino.goose_income)):
+            listener = self._listener(self.changes[ledger])
+            balance.add_listener(listener)
+            self._subscriptions.append((balance, listener))
+
+    @staticmethod
+    def _listener(changes: List[Tuple[str, int, int]]):
+        """
+        Возвращает:
+        слушателя, дописывающего изменение в список changes
+        """
+        def listener(key: str, old_value: int, new_value: int) -> None:
+            changes.append((key, old_value, new_value))
+        return listener
+
+    def take(self) -> List[Tuple[str, str, int, int]]:
+        """
+        Возвращает накопленные изменения и очищает их
+
+        Возвращает:
+        список кортежей (ledger, ключ, старое значение, новое значение),
+        сначала изменения balance, затем goose_income
+        """
+        result = []
+        for ledger, changes in self.changes.items():
+            result.extend((ledger,) + change for change in changes)
+            changes.clear()
+        return result
+
+    def close(self) -> None:
+        """
+        Отписывается от балансов казино
+        """
+        for balance, listener in self._subscriptions:
+            balance.remove_listener(listener)
+        self._subscriptions = []
+
+    def __enter__(self) -> 'ChangeRecorder':
+        """
+        Возвращает:
+        сам сборщик (для with)
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Отписывается при выходе из with
+        """
+        self.close()
+
+
+def export_run(casino: Casino, steps: int, path: str, fmt: Optional[str] = None,
+               chunk_size: int = 10000) -> int:
+    """
+    Выполняет steps шагов казино, выгружая каждое событие и изменения балансов в файл.
+    Изменения собираются в момент записи (ChangeRecorder), поэтому выгрузка полная
+    при любом режиме лога казино
+
+    Аргументы:
+    casino - казино
+    steps - количество шагов
+    path - путь к файлу выгрузки
+    fmt - формат (по умолчанию по расширению файла)
+    chunk_size - размер пачки строк
+
+    Возвращает:
+    количество записанных строк
+    """
+    with EventExporter(path, fmt, chunk_size) as exporter, ChangeRecorder(casino) as recorder:
+        for _ in range(steps):
+            result = casino.step()
+            exporter.write(casino.step_count, result, recorder.take())
+    return exporter.rows_written
+
+
+def read_ndjson(path: str) -> List[Dict[str, Any]]:
+    """
+    Читает выгрузку NDJSON
+
+    Аргументы:
+    path - путь к файлу
+
+    Возвращает:
+    список строк выгрузки в виде словарей
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    pass
@@ -2,9 +2,284 @@ import random
 from src.Players import *
 from src.Wanna_play_kazik import *
 from src.We_need_one_more_goose import *
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
 
 
-def run_sim(steps: int = 20, seed: int | None = None, inf: bool = False) -> None:
+def build_casino(rng: random.Random | None = None, players: Optional[Iterable[Player]] = None) -> Casino:
+    """
+    Создаёт казино и регистрирует в нём игроков и стандартный набор гусей
+
+    Аргументы:
+    rng - генератор случайных чисел казино (по умолчанию новый random.Random())
+    players - игроки казино (по умолчанию стандартные четыре игрока)
+
+    Возвращает:
+    готовое к симуляции казино
+    """
+    casino = Casino(rng=rng)
+
+    if players is None:
+        players = [
+            Player("Алексей", 200),
+            Player("Мария", 150),
+            Player("Иван", 100),
+            Player("Ольга", 80),
+        ]
+
+    casino.register_players(players)
+
+    geese = [
+        WarGoose("Боевой Геннадий", 5, 15),
+        HonkGoose("Крикун Василий", 10, 7),
+        Goose("Обычный Петр", 3),
+        WarGoose("Атакующий Максим", 7, 12),
+    ]
+
+    for goose in geese:
+        casino.register_geese(goose)
+
+    return casino
+
+
+class BatchResult:
+    """
+    Результаты пакетного прогона множества симуляций.
+    Данные хранятся по столбцам: для каждого участника - массив значений по всем сидам
+
+    Атрибуты:
+    seeds - сиды прогонов (в порядке запуска)
+    balances - словарь имя игрока -> array('q') финальных балансов
+    goose_income - словарь имя гуся -> array('q') финальных доходов
+
+    Методы:
+    run - итоги одного прогона по его номеру
+    """
+
+    def __init__(self, seeds: List[int]):
+        """
+        Инициализация пустых столбцов результатов
+
+        Аргументы:
+        seeds - сиды прогонов
+        """
+        self.seeds = seeds
+        self.balances: Dict[str, array] = {}
+        self.goose_income: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество прогонов
+        """
+        return len(self.seeds)
+
+    def run(self, index: int) -> tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Собирает итоги одного прогона
+
+        Аргументы:
+        index - номер прогона
+
+        Возвращает:
+        пару словарей (финальные балансы, доходы гусей)
+        """
+        balances = {name: column[index] for name, column in self.balances.items()}
+        income = {name: column[index] for name, column in self.goose_income.items()}
+        return balances, income
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'BatchResult(runs={runs})'
+        """
+        return f'BatchResult(runs={len(self.seeds)})'
+
+
+def run_batch(seeds: Iterable[int], steps: int = 20) -> BatchResult:
+    """
+    Прогоняет по одной симуляции на каждый сид без вывода на экран.
+    Для каждого сида результат совпадает с run_sim(steps, seed)
+
+    Аргументы:
+    seeds - сиды симуляций
+    steps - количество шагов каждой симуляции (по умолчанию 20)
+
+    Возвращает:
+    BatchResult со столбцами финальных балансов и доходов гусей
+    """
+    if steps < 0:
+        raise ValueError('Задано отрицательное количество шагов')
+
+    result = BatchResult(list(seeds))
+    for seed in result.seeds:
+        casino = build_casino(random.Random(seed))
+        for _ in range(steps):
+            casino.step()
+
+        for name, value in casino.balance.items():
+            result.balances.setdefault(name, array('q')).append(value)
+        for name, value in casino.goose_income.items():
+            result.goose_income.setdefault(name, array('q')).append(value)
+    return result
+
+
+class SimResult:
+    """
+    Компактные итоги одной симуляции (передаются между процессами)
+
+    Атрибуты:
+    seed - сид симуляции
+    steps - количество шагов
+    balances - финальные балансы игроков
+    goose_income - доходы гусей
+    richest_player - пара (имя, баланс) самого богатого игрока или None
+    richest_goose - пара (имя, доход) самого успешного гуся или None
+    stats - счётчики профилирования событий (Casino.stats), пусто без профилирования
+    """
+
+    def __init__(self, seed: Optional[int], steps: int, balances: Dict[str, int],
+                 goose_income: Dict[str, int], richest_player: Optional[Tuple[str, int]],
+                 richest_goose: Optional[Tuple[str, int]],
+                 stats: Optional[Dict[str, Dict[str, int]]] = None):
+        """
+        Инициализация итогов симуляции
+
+        Аргументы:
+        seed - сид симуляции
+        steps - количество шагов
+        balances - финальные балансы игроков
+        goose_income - доходы гусей
+        richest_player - самый богатый игрок
+        richest_goose - самый успешный гусь
+        stats - счётчики профилирования событий (по умолчанию пусто)
+        """
+        self.seed = seed
+        self.steps = steps
+        self.balances = balances
+        self.goose_income = goose_income
+        self.richest_player = richest_player
+        self.richest_goose = richest_goose
+        self.stats = stats if stats is not None else {}
+
+    @classmethod
+    def from_casino(cls, casino: Casino, seed: Optional[int], steps: int) -> 'SimResult':
+        """
+        Собирает итоги по состоянию казино
+
+        Аргументы:
+        casino - казино после симуляции
+        seed - сид симуляции
+        steps - количество шагов
+
+        Возвращает:
+        объект SimResult
+        """
+        richest_player = None
+        rich_players = casino.players.get_players_with_balance()
+        if rich_players:
+            richest = max(rich_players, key=lambda p: p.balance)
+            richest_player = (richest.name, richest.balance)
+
+        richest_goose = None
+        if casino.goose_income:
+            richest_goose = max(casino.goose_income.items(), key=lambda x: x[1])
+
+        return cls(seed, steps, dict(casino.balance), dict(casino.goose_income),
+                   richest_player, richest_goose, casino.stats())
+
+    def __repr__(self) -> str:
+        """
+        Возвращает:
+        строку в формате 'SimResult(seed={seed}, richest_player={richest_player})'
+        """
+        return f'SimResult(seed={self.seed}, richest_player={self.richest_player})'
+
+
+def _run_seed(seed: int, steps: int) -> SimResult:
+    """
+    Выполняет одну симуляцию без вывода (используется процессами пула)
+
+    Аргументы:
+    seed - сид симуляции
+    steps - количество шагов
+
+    Возвращает:
+    итоги симуляции
+    """
+    casino = build_casino(random.Random(seed))
+    for _ in range(steps):
+        casino.step()
+    return SimResult.from_casino(casino, seed, steps)
+
+
+def run_sweep(seeds: Iterable[int], steps: int = 20, workers: Optional[int] = None) -> List[SimResult]:
+    """
+    Прогоняет симуляции по всем сидам в пуле процессов.
+    Результаты возвращаются в порядке сидов, поэтому вывод детерминирован
+
+    Аргументы:
+    seeds - сиды симуляций
+    steps - количество шагов каждой симуляции (по умолчанию 20)
+    workers - количество процессов (по умолчанию - число ядер, 1 - без пула)
+
+    Возвращает:
+    список SimResult в порядке сидов
+    """
+    if steps < 0:
+        raise ValueError('Задано отрицательное количество шагов')
+
+    seeds = list(seeds)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(seeds) <= 1:
+        return [_run_seed(seed, steps) for seed in seeds]
+
+    chunksize = max(1, len(seeds) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_seed, seeds, repeat(steps), chunksize=chunksize))
+
+
+OUTPUT_MODES = ('stream', 'buffered', 'silent')
+
+
+def save_checkpoint(casino: Casino, path: str) -> None:
+    """
+    Атомарно записывает снимок казино в файл (через временный файл и os.replace),
+    чтобы падение во время записи не испортило предыдущий снимок
+
+    Аргументы:
+    casino - казино для сохранения
+    path - путь к файлу снимка
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(casino.snapshot())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Casino:
+    """
+    Загружает казино из файла снимка
+
+    Аргументы:
+    path - путь к файлу снимка
+
+    Возвращает:
+    восстановленное казино
+    """
+    with open(path, 'rb') as f:
+        return Casino.restore(f.read())
+
+
+def run_sim(steps: int = 20, seed: int | None = None, inf: bool = False,
+            output: str = 'stream', file: Optional[TextIO] = None,
+            checkpoint_path: Optional[str] = None, checkpoint_every: int = 0,
+            profile: bool = False, profile_alloc: bool = False) -> Optional[SimResult]:
     """
     Запускает пошаговую симуляцию работы казино с игроками и гусями.
     Создаёт казино, регестрирует игроков и гусей, выполняет заданное количество шагов
@@ -12,77 +287,119 @@ def run_sim(steps: int = 20, seed: int | None = None, inf: bool = False) -> None
 
     Аргументы:
     steps - количество шагов симуляции (по умолчанию 20)
-    seed - ключ генерации событий (по умолчанию случайный)
+    seed - ключ генерации событий (по умолчанию случайный). Симуляция использует
+    собственный генератор random.Random(seed), а не общее состояние модуля random
+    inf - выводить ли начальное состояние и итоговую статистику
+    output - режим вывода: stream (сразу), buffered (одной записью в конце)
+    или silent (без вывода). По умолчанию stream
+    file - файловый объект для вывода (по умолчанию sys.stdout)
+    checkpoint_path - файл снимка. Если он уже существует, симуляция продолжается
+    с сохранённого в нём шага
+    checkpoint_every - сохранять снимок каждые checkpoint_every шагов (0 - не сохранять)
+    profile - профилировать события: счётчики выводятся (в статистике при inf,
+    иначе в отдельном разделе) и сохраняются в SimResult.stats
+    profile_alloc - дополнительно считать прирост памяти событий через tracemalloc
 
     Выводит:
     результаты тех или иных событий
     итоговую статистику
+
+    Возвращает:
+    итоги симуляции (SimResult) в любом режиме вывода, None при ошибке
     """
-    try:
-        if seed is not None:
-            random.seed(seed)
+    if output not in OUTPUT_MODES:
+        raise ValueError(f'Неизвестный режим вывода: {output}')
+    out = file if file is not None else sys.stdout
+    verbose = output != 'silent'
+    inf = inf and verbose
+    lines: List[str] = []
 
-        if inf:
-            print(f"=== Начало симуляции (шагов: {steps}, seed: {seed}) ===")
+    def emit(text: str) -> None:
+        """
+        Выводит строку в выбранном режиме: сразу в out, в буфер или никуда
 
-        casino = Casino()
+        Аргументы:
+        text - строка вывода
+        """
+        if output == 'stream':
+            print(text, file=out)
+        elif output == 'buffered':
+            lines.append(text)
 
-        players = [
-            Player("Алексей", 200),
-            Player("Мария", 150),
-            Player("Иван", 100),
-            Player("Ольга", 80),
-        ]
-
-        for player in players:
-            casino.register_player(player)
+    sim_result = None
+    try:
+        rng = random.Random(seed)
 
-        geese = [
-            WarGoose("Боевой Геннадий", 5, 15),
-            HonkGoose("Крикун Василий", 10, 7),
-            Goose("Обычный Петр", 3),
-            WarGoose("Атакующий Максим", 7, 12),
-        ]
+        if inf:
+            emit(f"=== Начало симуляции (шагов: {steps}, seed: {seed}) ===")
 
-        for goose in geese:
-            casino.register_geese(goose)
+        start = 0
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            casino = load_checkpoint(checkpoint_path)
+            start = casino.step_count
+        else:
+            casino = build_casino(rng)
+        if profile or profile_alloc:
+            casino.enable_profiling(trace_alloc=profile_alloc)
 
         if inf:
-            print(f"\nИгроки: {casino.players}")
-            print(f"Гуси: {casino.geese}")
-            print(f"Балансы: {casino.balance}")
-            print(f"Доходы гусей: {casino.goose_income}")
+            emit(f"\nИгроки: {casino.players}")
+            emit(f"Гуси: {casino.geese}")
+            emit(f"Балансы: {casino.balance}")
+            emit(f"Доходы гусей: {casino.goose_income}")
 
-        print(f"\n=== Ход симуляции ===")
+        emit(f"\n=== Ход симуляции ===")
     #    for i in range(1, steps + 1): # Ошибка1: симуляция начинается с шага 2
         if steps >= 0:
-            for i in range(steps): # Ошибка 4. Отсутствует проверка значений steps
-                print(f"Шаг {i + 1}:")
-                result = casino.step()
-                print(f"  {result}\n")
+            for i in range(start, steps): # Ошибка 4. Отсутствует проверка значений steps
+                if verbose:
+                    emit(f"Шаг {i + 1}:")
+                    result = casino.step()
+                    emit(f"  {result}\n")
+                else:
+                    casino.step()
+                if checkpoint_path is not None and checkpoint_every > 0 and (i + 1) % checkpoint_every == 0:
+                    save_checkpoint(casino, checkpoint_path)
         else:
-            print("Задано отрицательное количество шагов, симуляция не была запущена")
+            emit("Задано отрицательное количество шагов, симуляция не была запущена")
 
         if inf:
-            print(f"\n=== Итоги симуляции ===")
-            print(f"Финальные балансы: {casino.balance}")
-            print(f"Доходы гусей: {casino.goose_income}")
+            emit(f"\n=== Итоги симуляции ===")
+            emit(f"Финальные балансы: {casino.balance}")
+            emit(f"Доходы гусей: {casino.goose_income}")
 
-            print(f"\n=== Статистика ===")
+            emit(f"\n=== Статистика ===")
             rich_players = casino.players.get_players_with_balance()
-            print(f"Игроков с деньгами: {len(rich_players)} из {len(casino.players)}")
+            emit(f"Игроков с деньгами: {len(rich_players)} из {len(casino.players)}")
 
             if rich_players:
                 richest = max(rich_players, key=lambda p: p.balance)
-                print(f"Самый богатый игрок: {richest.name} с балансом {richest.balance}")
+                emit(f"Самый богатый игрок: {richest.name} с балансом {richest.balance}")
 
             if casino.goose_income:
                 richest_goose = max(casino.goose_income.items(), key=lambda x: x[1])
-                print(f"Самый успешный гусь: {richest_goose[0]} с доходом {richest_goose[1]}")
+                emit(f"Самый успешный гусь: {richest_goose[0]} с доходом {richest_goose[1]}")
+
+        if profile or profile_alloc:
+            if not inf:
+                emit(f"\n=== Профилирование ===")
+            for name, stats in casino.stats().items():
+                line = (f"{name}: вызовов {stats['calls']}, всего {stats['total_ns'] / 1e6:.3f} мс, "
+                        f"p50 {stats['p50_ns'] / 1e3:.1f} мкс, p99 {stats['p99_ns'] / 1e3:.1f} мкс")
+                if profile_alloc:
+                    line += f", память {stats['alloc_bytes']} байт"
+                emit(line)
+
+        casino.disable_profiling()
+        sim_result = SimResult.from_casino(casino, seed, max(steps, 0))
     except ValueError:
         raise ValueError
     except Exception as e:
-        print(f"error: {e}")
+        emit(f"error: {e}")
+    finally:
+        if lines:
+            out.write('\n'.join(lines) + '\n')
+    return sim_result
 
 
 if __name__ == "__main__":
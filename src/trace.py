@@ -0,0 +1,379 @@
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from src.export import ChangeRecorder
+from src.Wanna_play_kazik import Casino
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+MAGIC = b'CASTRACE'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqqq')
+FIELDS = ('step', 'key', 'old', 'new')
+RECORD_SIZE = 8 * len(FIELDS)
+
+
+class TraceWriter:
+    """
+    Запись трассы симуляции в бинарный файл с записями фиксированной длины.
+
+    Формат файла:
+    заголовок (MAGIC, версия, резерв, количество записей, смещение и длина оглавления),
+    затем записи по четыре int64 (шаг, номер ключа, старое значение, новое значение),
+    затем для каждого ключа массив int64 номеров его записей,
+    в конце оглавление в JSON (ключи и положение их массивов).
+    Массивы номеров строятся при закрытии вторым проходом по уже записанным записям
+    (через mmap), поэтому в памяти держится только буфер и счётчики по ключам
+
+    Атрибуты:
+    path - путь к файлу трассы
+    count - количество записанных изменений
+
+    Методы:
+    write - добавляет изменение баланса
+    close - дописывает индекс ключей и заголовок
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536):
+        """
+        Инициализация записи трассы
+
+        Аргументы:
+        path - путь к файлу трассы
+        chunk_size - количество записей в буфере перед записью на диск
+        """
+        self.path = path
+        self.count = 0
+        self._chunk_size = chunk_size
+        self._buffer = array('q')
+        self._keys: List[Tuple[str, str]] = []
+        self._key_ids: Dict[Tuple[str, str], int] = {}
+        self._file: Optional[BinaryIO] = open(path, 'w+b')
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0))
+
+    def write(self, step: int, ledger: str, key: str, old_value: int, new_value: int) -> None:
+        """
+        Добавляет изменение баланса
+
+        Аргументы:
+        step - номер шага
+        ledger - balance или goose_income
+        key - имя игрока или гуся
+        old_value - старое значение
+        new_value - новое значение
+        """
+        key_id = self._key_ids.get((ledger, key))
+        if key_id is None:
+            key_id = len(self._keys)
+            self._key_ids[ledger, key] = key_id
+            self._keys.append((ledger, key))
+        self._buffer.extend((step, key_id, old_value, new_value))
+        self.count += 1
+        if len(self._buffer) >= self._chunk_size * len(FIELDS):
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Записывает буфер записей на диск
+        """
+        if self._file is None:
+            raise ValueError(f'Трасса {self.path} уже закрыта')
+        self._buffer.tofile(self._file)
+        self._buffer = array('q')
+
+    def _write_index(self, file: BinaryIO) -> List[List]:
+        """
+        Строит массивы номеров записей по ключам вторым проходом по записям файла:
+        подсчёт записей каждого ключа, затем раскладка номеров по их массивам
+
+        Аргументы:
+        file - открытый файл трассы
+
+        Возвращает:
+        оглавление: список [ledger, имя, смещение массива, длина массива]
+        """
+        if not self.count:
+            return []
+        records_end = HEADER.size + self.count * RECORD_SIZE
+        file.flush()
+        file.truncate(records_end + self.count * 8)
+        toc = []
+        with mmap.mmap(file.fileno(), 0) as mapped:
+            view = memoryview(mapped)
+            records = view[HEADER.size:records_end].cast('q')
+            key_column = records[1::len(FIELDS)]
+            counts = array('q', [0]) * len(self._keys)
+            for key_id in key_column:
+                counts[key_id] += 1
+            cursors = array('q', counts)
+            offset = 0
+            for key_id, ((ledger, key), size) in enumerate(zip(self._keys, counts)):
+                toc.append([ledger, key, offset, size])
+                cursors[key_id] = offset
+                offset += size
+            positions = view[records_end:].cast('q')
+            for index, key_id in enumerate(key_column):
+                positions[cursors[key_id]] = index
+                cursors[key_id] += 1
+            for item in (positions, key_column, records, view):
+                item.release()
+        file.seek(0, 2)
+        return toc
+
+    def close(self) -> None:
+        """
+        Дописывает индекс ключей, оглавление и заголовок, закрывает файл
+        """
+        file = self._file
+        if file is None:
+            return
+        self._flush()
+        toc = self._write_index(file)
+        footer_offset = file.tell()
+        footer = json.dumps(toc, ensure_ascii=False).encode('utf-8')
+        file.write(footer)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, self.count, footer_offset, len(footer)))
+        file.close()
+        self._file = None
+
+    def __enter__(self) -> 'TraceWriter':
+        """
+        Возвращает:
+        саму запись трассы (для with)
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Закрывает трассу при выходе из with
+        """
+        self.close()
+
+
+class _KeySteps:
+    """
+    Последовательность шагов записей одного ключа (для bisect без копирования)
+    """
+
+    __slots__ = ('records', 'positions')
+
+    def __init__(self, records: memoryview, positions: memoryview):
+        """
+        Аргументы:
+        records - записи трассы (memoryview типа 'q')
+        positions - номера записей ключа в порядке шагов
+        """
+        self.records = records
+        self.positions = positions
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество записей ключа
+        """
+        return len(self.positions)
+
+    def __getitem__(self, index: int) -> int:
+        """
+        Возвращает:
+        шаг записи ключа с номером index
+        """
+        return self.records[self.positions[index] * len(FIELDS)]
+
+
+class TraceReader:
+    """
+    Чтение трассы через mmap. Данные не копируются: столбцы и индексы ключей -
+    это memoryview поверх отображённого файла (при наличии numpy доступен as_numpy)
+
+    Атрибуты:
+    path - путь к файлу трассы
+    keys - список пар (ledger, имя)
+
+    Методы:
+    column - столбец записей (шаг, ключ, старое или новое значение)
+    record - запись по номеру
+    at - баланс ключа на шаге
+    curve - история значений ключа
+    close - закрывает файл
+    """
+
+    def __init__(self, path: str):
+        """
+        Открывает трассу и отображает её в память
+
+        Аргументы:
+        path - путь к файлу трассы
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, footer_offset, footer_len = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'Файл {path} не является трассой версии {VERSION}')
+
+        self._count = count
+        self._view = memoryview(self._mmap)
+        records_end = HEADER.size + count * RECORD_SIZE
+        self._records = self._view[HEADER.size:records_end].cast('q')
+        self._positions = self._view[records_end:footer_offset].cast('q')
+        toc = json.loads(bytes(self._mmap[footer_offset:footer_offset + footer_len]).decode('utf-8'))
+        self.keys = [(ledger, key) for ledger, key, _, _ in toc]
+        self._index = {(ledger, key): (offset, size) for ledger, key, offset, size in toc}
+
+    def __len__(self) -> int:
+        """
+        Возвращает:
+        количество записей в трассе
+        """
+        return self._count
+
+    def column(self, name: str) -> memoryview:
+        """
+        Возвращает столбец записей без копирования
+
+        Аргументы:
+        name - step, key, old или new
+
+        Возвращает:
+        memoryview со значениями столбца
+        """
+        return self._records[FIELDS.index(name)::len(FIELDS)]
+
+    def record(self, index: int) -> Tuple[int, str, str, int, int]:
+        """
+        Возвращает запись по номеру
+
+        Аргументы:
+        index - номер записи
+
+        Возвращает:
+        кортеж (шаг, ledger, имя, старое значение, новое значение)
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('Trace index out of range')
+        base = index * len(FIELDS)
+        step, key_id, old_value, new_value = self._records[base:base + len(FIELDS)]
+        ledger, key = self.keys[key_id]
+        return step, ledger, key, old_value, new_value
+
+    def _key_positions(self, key: str, ledger: str) -> memoryview:
+        """
+        Возвращает номера записей ключа (без копирования)
+
+        Аргументы:
+        key - имя игрока или гуся
+        ledger - balance или goose_income
+        """
+        if (ledger, key) not in self._index:
+            raise KeyError(key)
+        offset, size = self._index[ledger, key]
+        return self._positions[offset:offset + size]
+
+    def at(self, key: str, step: int, ledger: str = 'balance') -> Optional[int]:
+        """
+        Возвращает значение ключа после шага step за O(log n)
+
+        Аргументы:
+        key - имя игрока или гуся
+        step - номер шага
+        ledger - balance или goose_income (по умолчанию balance)
+
+        Возвращает:
+        значение или None, если до этого шага ключ не менялся
+        """
+        positions = self._key_positions(key, ledger)
+        index = bisect_right(_KeySteps(self._records, positions), step)
+        if index == 0:
+            return None
+        return self._records[positions[index - 1] * len(FIELDS) + 3]
+
+    def curve(self, key: str, ledger: str = 'goose_income') -> List[Tuple[int, int]]:
+        """
+        Возвращает историю значений ключа
+
+        Аргументы:
+        key - имя игрока или гуся
+        ledger - balance или goose_income (по умолчанию goose_income)
+
+        Возвращает:
+        список пар (шаг, новое значение)
+        """
+        records = self._records
+        width = len(FIELDS)
+        return [(records[pos * width], records[pos * width + 3]) for pos in self._key_positions(key, ledger)]
+
+    def as_numpy(self):
+        """
+        Возвращает:
+        структурированный массив numpy поверх файла (без копирования)
+        """
+        if numpy is None:
+            raise ImportError('Для as_numpy нужен пакет numpy')
+        dtype = numpy.dtype([(name, '<i8') for name in FIELDS])
+        return numpy.frombuffer(self._mmap, dtype=dtype, count=self._count, offset=HEADER.size)
+
+    def close(self) -> None:
+        """
+        Освобождает представления и закрывает файл
+        """
+        for name in ('_positions', '_records', '_view'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> 'TraceReader':
+        """
+        Возвращает:
+        сам объект чтения (для with)
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Закрывает трассу при выходе из with
+        """
+        self.close()
+
+
+def record_trace(casino: Casino, steps: int, path: str) -> int:
+    """
+    Выполняет steps шагов казино и записывает все изменения балансов в трассу.
+    Изменения собираются в момент записи (ChangeRecorder), поэтому трасса полная
+    при любом режиме лога казино
+
+    Аргументы:
+    casino - казино
+    steps - количество шагов
+    path - путь к файлу трассы
+
+    Возвращает:
+    количество записанных изменений
+    """
+    with TraceWriter(path) as writer, ChangeRecorder(casino) as recorder:
+        for _ in range(steps):
+            casino.step()
+            for ledger, key, old_value, new_value in recorder.take():
+                writer.write(casino.step_count, ledger, key, old_value, new_value)
+    return writer.count
+
+
+if __name__ == "__main__":
+    pass
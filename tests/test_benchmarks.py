@@ -0,0 +1,38 @@
+import json
+import math
+from benchmarks.bench_speed import compare, main
+
+
+class TestCompare:
+    def test_compare_flags_regression(self):
+        """Тестирование поиска регрессий при сравнении замеров"""
+        baseline = {
+            "steps[4]": {"value": 1000.0, "unit": "ops/s", "higher_is_better": True},
+            "memory.bytes_per_step": {"value": 100.0, "unit": "bytes", "higher_is_better": False},
+            "event.removed": {"value": 5.0, "unit": "ops/s", "higher_is_better": True},
+        }
+        current = {
+            "steps[4]": {"value": 850.0, "unit": "ops/s", "higher_is_better": True},
+            "memory.bytes_per_step": {"value": 105.0, "unit": "bytes", "higher_is_better": False},
+        }
+
+        rows = {row[0]: row for row in compare(baseline, current, threshold=0.1)}
+        assert set(rows) == {"steps[4]", "memory.bytes_per_step", "event.removed"}
+        assert rows["steps[4]"][4] is True
+        assert rows["event.removed"][4] is True
+        assert math.isnan(rows["event.removed"][2])
+        assert rows["memory.bytes_per_step"][4] is False
+        assert abs(rows["memory.bytes_per_step"][3] + 0.05) < 1e-9
+
+    def test_compare_command_exit_code(self, tmp_path):
+        """Тестирование кода выхода команды compare"""
+        base = tmp_path / "base.json"
+        new = tmp_path / "new.json"
+        base.write_text(json.dumps({"results": {"x": {"value": 10.0, "higher_is_better": True}}}))
+        new.write_text(json.dumps({"results": {"x": {"value": 5.0, "higher_is_better": True}}}))
+
+        assert main(["compare", str(base), str(new)]) == 1
+        assert main(["compare", str(base), str(new), "--threshold", "0.6"]) == 0
+
+        new.write_text(json.dumps({"results": {}}))
+        assert main(["compare", str(base), str(new), "--threshold", "0.6"]) == 1
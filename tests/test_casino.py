@@ -1,11 +1,21 @@
 import pytest
 import random
 from unittest.mock import Mock, patch
-from src.Wanna_play_kazik import Chip, CasinoBalance, Casino
-from src.Players import Player, PlayerCollection
+from src.Wanna_play_kazik import Chip, ChipPool, CasinoBalance, Casino, BalanceLog, StepResult
+from src.Players import Player, PlayerCollection, ArrayPlayerCollection
 from src.We_need_one_more_goose import Goose, WarGoose, HonkGoose
 
 
+def lottery(casino):
+    """Событие-плагин для тестов реестра событий"""
+    return StepResult('lottery', 'draw', amount=casino.rng.randint(1, 6))
+
+
+def lottery_many(casino, n):
+    """Пакетный вариант события-плагина"""
+    return [StepResult('lottery', 'draw', amount=value) for value in casino.rng.choices(range(1, 7), k=n)]
+
+
 class TestChip:
     def test_chip_initialization(self):
         """Тестирование создания фишки"""
@@ -21,6 +31,10 @@ class TestChip:
         assert isinstance(result, Chip)
         assert result.value == 50
 
+    def test_chip_slots(self):
+        """Тестирование отсутствия __dict__ у фишки"""
+        assert not hasattr(Chip(1), "__dict__")
+
     def test_chip_repr(self):
         """Тестирование строкового представления фишки"""
         chip = Chip(100)
@@ -116,6 +130,211 @@ class TestCasinoBalance:
 
         assert repr(balance) == "Casino_balance({'Иван': 100})"
 
+    def test_balance_at(self):
+        """Тестирование баланса на момент шага"""
+        balance = CasinoBalance(history=True)
+        for step in range(1, 101):
+            balance.step = step
+            balance["Иван"] = step * 10
+            if step % 3 == 0:
+                balance.update_many([("Мария", step)])
+
+        assert balance.at("Иван", 0) is None
+        assert balance.at("Иван", 7) == 70
+        assert balance.at("Иван", 1000) == 1000
+        assert balance.at("Мария", 8) == 6
+        with pytest.raises(KeyError):
+            balance.at("Ольга", 5)
+
+    def test_balance_history_range(self):
+        """Тестирование изменений баланса в диапазоне шагов"""
+        balance = CasinoBalance(history=True)
+        for step in range(1, 80):
+            balance.step = step
+            balance.apply_deltas({"Иван": -1})
+
+        assert balance.history("Иван", 40, 43) == [(40, -40), (41, -41), (42, -42)]
+        assert len(balance.history("Иван")) == 79
+        assert balance.history("Иван", 100) == []
+
+    def test_balance_history_fork(self):
+        """Тестирование истории в ветках балансов"""
+        balance = CasinoBalance(history=True)
+        balance.step = 1
+        balance["Иван"] = 100
+        child, = balance.fork()
+        balance.step = child.step = 2
+        balance["Иван"] = 50
+        child["Иван"] = 200
+
+        assert balance.history("Иван") == [(1, 100), (2, 50)]
+        assert child.history("Иван") == [(1, 100), (2, 200)]
+        assert child.at("Иван", 1) == 100
+        grandchild, = child.fork()
+        assert grandchild.at("Иван", 5) == 200
+
+    def test_balance_history_disabled(self):
+        """Тестирование выключенной истории"""
+        balance = CasinoBalance()
+        balance["Иван"] = 100
+        with pytest.raises(ValueError):
+            balance.at("Иван", 0)
+
+    def test_casino_history_opt_in(self):
+        """Тестирование включения истории балансов в казино"""
+        casino = Casino(log_mode='off', rng=random.Random(2), history=True)
+        casino.register_players([Player("Иван", 100), Player("Мария", 50)])
+        casino.step_many(30)
+
+        assert casino.balance.at("Иван", 30) == casino.balance["Иван"]
+        assert Casino().balance._history is None
+
+
+class TestChipPool:
+    def test_pool_add_and_views(self):
+        """Тестирование добавления фишек и получения объектов Chip"""
+        pool = ChipPool()
+        pool.add(10)
+        pool.add(25)
+
+        assert len(pool) == 2
+        assert pool[1].value == 25
+        assert [chip.value for chip in pool] == [10, 25]
+        assert pool.total() == 35
+
+    def test_pool_merge_keeps_size(self):
+        """Тестирование объединения фишек без роста пула"""
+        pool = ChipPool([5, 7])
+        rng = random.Random(1)
+        for _ in range(100):
+            pool.merge_in(1, rng)
+
+        assert len(pool) == 2
+        assert pool.total() == 112
+
+    def test_casino_chip_pool_bounded(self):
+        """Тестирование ограниченного размера пула в казино"""
+        casino = Casino(rng=random.Random(3), chip_capacity=4)
+        for _ in range(50):
+            casino.create_chip()
+
+        assert len(casino.chips) == 4
+
+
+class TestBalanceLog:
+    def test_log_records(self):
+        """Тестирование хранения изменений по столбцам"""
+        balance = CasinoBalance()
+        balance["Иван"] = 100
+        balance.step = 3
+        balance["Иван"] = 40
+
+        records = balance.get_records()
+        assert isinstance(records, BalanceLog)
+        assert len(records) == 2
+        assert records.record(1) == ("Иван", 100, 40, 3)
+        assert list(records.step) == [0, 3]
+        assert records.keys == ["Иван"]
+
+    def test_log_format_lazy(self):
+        """Тестирование сборки строк лога по запросу"""
+        balance = CasinoBalance()
+        balance["Иван"] = 100
+        balance["Иван"] = 150
+
+        assert balance.get_log() == [
+            "Баланс Иван: 0 -> 100 (Изменение: +100)",
+            "Баланс Иван: 100 -> 150 (Изменение: +50)",
+        ]
+
+    def test_log_widen(self):
+        """Тестирование перехода на 64-битные значения"""
+        balance = CasinoBalance()
+        balance["Иван"] = 100
+        balance["Иван"] = 2 ** 40
+
+        assert balance.get_records().record(1) == ("Иван", 100, 2 ** 40, 0)
+        assert balance.get_records().old.typecode == 'q'
+
+    def test_balance_bulk_update(self):
+        """Тестирование пакетного обновления балансов"""
+        balance = CasinoBalance()
+        balance["Иван"] = 100
+        balance.step = 2
+        balance.update({"Иван": 120, "Мария": 50})
+
+        assert dict(balance) == {"Иван": 120, "Мария": 50}
+        assert list(balance.get_records())[1:] == [("Иван", 100, 120, 2), ("Мария", 0, 50, 2)]
+
+    def test_balance_update_many_and_deltas(self):
+        """Тестирование update_many и apply_deltas"""
+        balance = CasinoBalance()
+        balance.update_many([("Иван", 100), ("Мария", 50)])
+        balance.apply_deltas({"Иван": -30, "Ольга": 5})
+
+        assert dict(balance) == {"Иван": 70, "Мария": 50, "Ольга": 5}
+        assert len(balance.get_log()) == 4
+        assert balance.get_log()[2] == "Баланс Иван: 100 -> 70 (Изменение: -30)"
+
+    def test_balance_bulk_update_ring(self):
+        """Тестирование пакетного обновления при кольцевом логе"""
+        balance = CasinoBalance(log_mode='ring', log_capacity=2)
+        balance.update([("a", 1), ("b", 2), ("c", 3)])
+
+        assert [key for key, _, _, _ in balance.get_records()] == ["b", "c"]
+
+    def test_log_ring(self):
+        """Тестирование кольцевого буфера лога"""
+        balance = CasinoBalance(log_mode='ring', log_capacity=3)
+        for value in range(1, 6):
+            balance["Иван"] = value
+
+        records = balance.get_records()
+        assert len(records) == 3
+        assert records.total == 5
+        assert records.evicted == 2
+        assert [new for _, _, new, _ in records] == [3, 4, 5]
+        assert records.record(0) == ("Иван", 2, 3, 0)
+        assert balance.get_log()[-1] == "Баланс Иван: 4 -> 5 (Изменение: +1)"
+
+    def test_log_sample(self):
+        """Тестирование выборочного лога"""
+        balance = CasinoBalance(log_mode='sample', log_every=2)
+        for value in range(1, 6):
+            balance["Иван"] = value
+
+        records = balance.get_records()
+        assert [new for _, _, new, _ in records] == [1, 3, 5]
+        assert records.skipped == 2
+        assert records.total == 5
+
+    def test_log_off(self):
+        """Тестирование отключённого лога"""
+        balance = CasinoBalance(log_mode='off')
+        balance["Иван"] = 100
+        balance["Иван"] = 50
+
+        assert balance["Иван"] == 50
+        assert balance.get_log() == []
+        assert balance.get_records().total == 2
+
+    def test_log_bad_mode(self):
+        """Тестирование неверных параметров лога"""
+        with pytest.raises(ValueError):
+            CasinoBalance(log_mode='всё')
+        with pytest.raises(ValueError):
+            CasinoBalance(log_mode='ring')
+
+    def test_casino_step_marks_log(self):
+        """Тестирование пометки изменений номером шага"""
+        casino = Casino()
+        casino.register_player(Player("Иван", 100))
+        casino.step()
+
+        assert casino.step_count == 1
+        assert casino.balance.step == 1
+        assert casino.goose_income.step == 1
+
 
 class TestCasino:
     @pytest.fixture
@@ -147,7 +366,8 @@ class TestCasino:
         assert isinstance(casino.geese, PlayerCollection)
         assert isinstance(casino.balance, CasinoBalance)
         assert isinstance(casino.goose_income, CasinoBalance)
-        assert casino.chips == []
+        assert isinstance(casino.chips, ChipPool)
+        assert len(casino.chips) == 0
 
     def test_register_player(self, casino):
         """Тестирование регистрации игрока"""
@@ -157,6 +377,13 @@ class TestCasino:
         assert player in casino.players
         assert casino.balance["Алексей"] == 200
 
+    def test_register_players(self, casino, sample_players):
+        """Тестирование пакетной регистрации игроков"""
+        casino.register_players(sample_players)
+
+        assert len(casino.players) == 3
+        assert dict(casino.balance) == {"Алексей": 200, "Мария": 150, "Иван": 0}
+
     def test_register_geese(self, casino):
         """Тестирование регистрации гуся"""
         goose = Goose("Петр", 5)
@@ -171,14 +398,14 @@ class TestCasino:
             casino.register_player(player)
 
         # Фиксируем выбор игрока и случайные числа
-        monkeypatch.setattr(random, "choice", lambda lst: sample_players[0])
-        monkeypatch.setattr(random, "randint", lambda a, b: 50)
-        monkeypatch.setattr(random, "random", lambda: 0.8)  # Выигрыш
+        monkeypatch.setattr(casino.rng, "choice", lambda lst: sample_players[0])
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 50)
+        monkeypatch.setattr(casino.rng, "random", lambda: 0.8)  # Выигрыш
 
         result = casino.players_bet()
 
-        assert "Алексей" in result
-        assert "выигрывает" in result
+        assert "Алексей" in str(result)
+        assert "выигрывает" in str(result)
         assert casino.balance["Алексей"] == 300  # 200 - 50 + 150
 
     def test_players_bet_no_rich_players(self, casino):
@@ -187,7 +414,7 @@ class TestCasino:
         casino.register_player(player)
 
         result = casino.players_bet()
-        assert result == "Никто не может сделать ставку"
+        assert str(result) == "Никто не может сделать ставку"
 
     def test_geese_attack(self, casino, sample_players, sample_geese, monkeypatch):
         """Тестирование атаки гусей"""
@@ -204,9 +431,9 @@ class TestCasino:
             else:
                 return sample_players[0]
 
-        monkeypatch.setattr(random, "choice", mock_choice)
+        monkeypatch.setattr(casino.rng, "choice", mock_choice)
         result = casino.geese_attack()
-        assert "атакует" in result.lower()
+        assert "атакует" in str(result).lower()
 
     def test_geese_attack_no_war_geese(self, casino, sample_players):
         """Тестирование атаки без военных гусей"""
@@ -215,7 +442,7 @@ class TestCasino:
         casino.register_player(sample_players[0])
 
         result = casino.geese_attack()
-        assert "Нет военных гусей" in result
+        assert "Нет военных гусей" in str(result)
 
     def test_goose_honk_honkgoose(self, casino, sample_geese, sample_players, monkeypatch):
         """Тестирование гудения гуся-крикуна"""
@@ -224,9 +451,9 @@ class TestCasino:
         casino.register_geese(sample_geese[2])  # HonkGoose
 
         mock_result = "Крикун издает особый крик! 2 игроков получили по 7 монет."
-        with patch.object(sample_geese[2], 'super_honk', return_value=mock_result):
+        with patch.object(HonkGoose, 'honk_players', return_value=2):
             result = casino.goose_honk()
-            assert result == mock_result
+            assert str(result) == mock_result
 
     def test_goose_honk_regular(self, casino, sample_geese, sample_players, monkeypatch):
         """Тестирование обычного гудения"""
@@ -240,10 +467,60 @@ class TestCasino:
                     return item
             return lst[0]
 
-        monkeypatch.setattr(random, "choice", mock_choice)
+        monkeypatch.setattr(casino.rng, "choice", mock_choice)
 
         result = casino.goose_honk()
-        assert "кричит с громкостью" in result
+        assert "кричит с громкостью" in str(result)
+
+    def test_geese_type_indexes(self, casino, sample_geese):
+        """Тестирование индексов гусей по классам"""
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        extra = WarGoose("Второй боевой", 3, 4)
+        casino.register_geese(extra)
+        casino.register_geese(extra)
+
+        assert casino.geese_of_type(WarGoose) == [sample_geese[1], extra]
+        assert casino.geese_of_type(HonkGoose) == [sample_geese[2]]
+        assert casino.geese_of_type(Goose) == [sample_geese[0]]
+
+        casino._unindex_goose(sample_geese[1])
+        assert casino.geese_of_type(WarGoose) == [extra]
+        assert casino._goose_slots[id(extra)] == (WarGoose, 0)
+
+        branch, = casino.fork(1)
+        branch.register_geese(WarGoose("Ветка", 1, 1))
+        assert len(branch.geese_of_type(WarGoose)) == 2
+        assert casino.geese_of_type(WarGoose) == [extra]
+
+    def test_unregister_player(self, casino, sample_players):
+        """Тестирование удаления игрока из казино"""
+        casino.register_players(sample_players)
+
+        casino.unregister_player("Мария")
+        casino.unregister_player(sample_players[2])
+        assert [p.name for p in casino.players] == ["Алексей"]
+        assert dict(casino.balance) == {"Алексей": 200}
+        assert casino.players.count_with_balance() == 1
+        with pytest.raises(ValueError):
+            casino.unregister_player("Мария")
+
+    def test_unregister_goose(self, casino, sample_players, sample_geese):
+        """Тестирование удаления гуся из казино"""
+        casino.register_players(sample_players)
+        for goose in sample_geese:
+            casino.register_geese(goose)
+
+        casino.unregister_goose("Боевой")
+        assert casino.geese_of_type(WarGoose) == []
+        assert "Боевой" not in casino.goose_income
+        assert sample_geese[1] not in casino.geese
+        assert "Нет военных гусей" in str(casino.geese_attack())
+
+        casino.unregister_goose(sample_geese[0])
+        assert [goose.name for goose in casino.geese] == ["Крикун"]
+        for _ in range(30):
+            casino.step()
 
     def test_goose_steal(self, casino, sample_players, sample_geese, monkeypatch):
         """Тестирование кражи денег"""
@@ -263,10 +540,10 @@ class TestCasino:
                         return player
                 return lst[0]
 
-        monkeypatch.setattr(random, "choice", mock_choice)
-        monkeypatch.setattr(random, "randint", lambda a, b: 20)
+        monkeypatch.setattr(casino.rng, "choice", mock_choice)
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 20)
         result = casino.goose_steal()
-        assert "украл" in result.lower() or "попытался" in result.lower()
+        assert "украл" in str(result).lower() or "попытался" in str(result).lower()
 
     def test_goose_steal_no_money(self, casino, sample_players, sample_geese, monkeypatch):
         """Тестирование кражи без денег"""
@@ -274,18 +551,18 @@ class TestCasino:
         casino.register_player(sample_players[2])
         casino.register_geese(sample_geese[0])
 
-        monkeypatch.setattr(random, "choice", lambda lst: sample_geese[0])
+        monkeypatch.setattr(casino.rng, "choice", lambda lst: sample_geese[0])
 
         result = casino.goose_steal()
-        assert "пытался украсть" in result
+        assert "пытался украсть" in str(result)
 
     def test_player_panic(self, casino, sample_players, monkeypatch):
         """Тестирование паники игрока"""
         casino.register_player(sample_players[0])
-        monkeypatch.setattr(random, "choice", lambda lst: sample_players[0])
+        monkeypatch.setattr(casino.rng, "choice", lambda lst: sample_players[0])
 
         result = casino.player_panic()
-        assert "паникует" in result
+        assert "паникует" in str(result)
         assert casino.balance["Алексей"] == 0
 
     def test_player_panic_no_rich_players(self, casino):
@@ -294,26 +571,29 @@ class TestCasino:
         casino.register_player(player)
 
         result = casino.player_panic()
-        assert "Все игроки приняли антидепрессанты" in result
+        assert "Все игроки приняли антидепрессанты" in str(result)
 
     def test_create_chip(self, casino, monkeypatch):
         """Тестирование создания фишки"""
-        monkeypatch.setattr(random, "randint", lambda a, b: 50)
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 50)
 
         result = casino.create_chip()
-        assert "Создана фишка" in result
+        assert "Создана фишка" in str(result)
         assert len(casino.chips) == 1
         assert casino.chips[0].value == 50
 
     def test_create_chip_with_combination(self, casino, monkeypatch):
         """Тестирование создания фишки с объединением"""
         # Создаем 3 фишки заранее
-        casino.chips = [Chip(10), Chip(20), Chip(30)]
+        casino.chips = ChipPool([10, 20, 30])
 
-        monkeypatch.setattr(random, "randint", lambda a, b: 40)
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 40)
+        monkeypatch.setattr(casino.rng, "randrange", lambda n: 1)
 
         result = casino.create_chip()
-        assert "объединена" in result.lower()
+        assert "объединена" in str(result).lower()
+        assert result.extra == 60
+        assert list(casino.chips.values) == [10, 60, 30]
 
     def test_goose_gang(self, casino, sample_geese, monkeypatch):
         """Тестирование объединения гусей"""
@@ -321,10 +601,10 @@ class TestCasino:
             casino.register_geese(goose)
 
         # Фиксируем выбор
-        monkeypatch.setattr(random, "sample", lambda lst, k: [sample_geese[0], sample_geese[1]])
+        monkeypatch.setattr(casino.rng, "sample", lambda lst, k: [sample_geese[0], sample_geese[1]])
 
         result = casino.goose_gang()
-        assert "объединились" in result
+        assert "объединились" in str(result)
 
     def test_goose_gang_not_enough(self, casino):
         """Тестирование объединения без достаточного количества гусей"""
@@ -332,7 +612,7 @@ class TestCasino:
         casino.register_geese(goose)
 
         result = casino.goose_gang()
-        assert "Гусей слишком мало" in result
+        assert "Гусей слишком мало" in str(result)
 
     def test_step(self, casino, monkeypatch):
         """Тестирование одного шага симуляции"""
@@ -343,17 +623,283 @@ class TestCasino:
         casino.register_geese(goose)
 
         # Фиксируем выбор события
-        monkeypatch.setattr(random, "choices", lambda events, weights, k: [casino.create_chip])
-        monkeypatch.setattr(random, "randint", lambda a, b: 25)
+        monkeypatch.setattr(casino.rng, "choices", lambda events, cum_weights, k: [casino.create_chip])
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 25)
 
         result = casino.step()
-        assert "Создана фишка" in result
+        assert "Создана фишка" in str(result)
 
     def test_step_empty_casino(self, casino, monkeypatch):
         """Тестирование шага в пустом казино"""
         # Фиксируем событие, которое не требует данных
-        monkeypatch.setattr(random, "choices", lambda events, weights, k: [casino.create_chip])
-        monkeypatch.setattr(random, "randint", lambda a, b: 25)
+        monkeypatch.setattr(casino.rng, "choices", lambda events, cum_weights, k: [casino.create_chip])
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 25)
 
         result = casino.step()
-        assert "Создана фишка" in result
\ No newline at end of file
+        assert "Создана фишка" in str(result)
+
+    def test_set_event_weights(self, casino, monkeypatch):
+        """Тестирование изменения весов событий"""
+        casino.set_event_weights({'players_bet': 0, 'geese_attack': 0, 'goose_honk': 0,
+                                  'goose_steal': 0, 'player_panic': 0, 'goose_gang': 0})
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 25)
+
+        results = casino.step_many(3)
+        assert len(results) == 3
+        assert all("Создана фишка" in str(result) for result in results)
+        assert casino.step_count == 3
+        assert casino.event_weights['create_chip'] == 0.15
+
+    def test_set_event_weights_invalid(self, casino):
+        """Тестирование неверных весов событий"""
+        with pytest.raises(ValueError):
+            casino.set_event_weights({'unknown': 1})
+        with pytest.raises(ValueError):
+            casino.set_event_weights({'players_bet': -1})
+        with pytest.raises(ValueError):
+            casino.set_event_weights({name: 0 for name in Casino.EVENT_WEIGHTS})
+
+    def test_step_result_fields(self, casino, sample_players, sample_geese, monkeypatch):
+        """Тестирование структурированного результата события"""
+        casino.register_player(sample_players[0])
+        casino.register_geese(sample_geese[0])
+        monkeypatch.setattr(casino.rng, "choice", lambda lst: lst[0])
+        monkeypatch.setattr(casino.rng, "randint", lambda a, b: 7)
+
+        result = casino.goose_steal()
+        assert isinstance(result, StepResult)
+        assert (result.event, result.outcome) == ('goose_steal', 'steal')
+        assert (result.actor, result.target) == ("Обычный", "Алексей")
+        assert (result.amount, result.before, result.after) == (7, 200, 193)
+        assert str(result) == "Обычный украл 7 у Алексей (баланс 193)."
+
+    def test_snapshot_restore(self, sample_players, sample_geese):
+        """Тестирование продолжения симуляции из снимка"""
+        casino = Casino(rng=random.Random(21))
+        casino.register_players(sample_players)
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        for _ in range(50):
+            casino.step()
+
+        restored = Casino.restore(casino.snapshot())
+        assert restored.step_count == 50
+        assert dict(restored.balance) == dict(casino.balance)
+        assert restored.balance.get_log() == casino.balance.get_log()
+        assert [type(goose) for goose in restored.geese] == [type(goose) for goose in casino.geese]
+
+        expected = [str(casino.step()) for _ in range(50)]
+        assert [str(restored.step()) for _ in range(50)] == expected
+        assert dict(restored.balance) == dict(casino.balance)
+        assert dict(restored.goose_income) == dict(casino.goose_income)
+        assert list(restored.chips.values) == list(casino.chips.values)
+
+    @pytest.mark.parametrize("backend", [PlayerCollection, ArrayPlayerCollection])
+    def test_snapshot_resume_after_bankruptcies(self, backend, sample_geese):
+        """Тестирование продолжения из снимка после разорения части игроков"""
+        casino = Casino(rng=random.Random(5), players=backend())
+        casino.register_players(Player(f"Игрок {i}", 5 + i % 7) for i in range(30))
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        for _ in range(150):
+            casino.step()
+        assert 0 < casino.players.count_with_balance() < 30
+
+        restored = Casino.restore(casino.snapshot())
+        expected = [str(casino.step()) for _ in range(150)]
+        assert [str(restored.step()) for _ in range(150)] == expected
+        assert dict(restored.balance) == dict(casino.balance)
+
+    def test_restore_bad_snapshot(self):
+        """Тестирование восстановления из снимка другой версии"""
+        import pickle, zlib
+        with pytest.raises(ValueError):
+            Casino.restore(zlib.compress(pickle.dumps({'version': 0})))
+
+    def test_fork_branches(self, sample_players, sample_geese):
+        """Тестирование ветвления казино"""
+        casino = Casino(rng=random.Random(4))
+        casino.register_players(sample_players)
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        for _ in range(40):
+            casino.step()
+
+        snapshot = casino.snapshot()
+        log_at_fork = casino.balance.get_log()
+        balances_at_fork = dict(casino.balance)
+        branches = casino.fork(3, seeds=[100, 101, 102])
+
+        for branch in branches:
+            for _ in range(40):
+                branch.step()
+        for _ in range(40):
+            casino.step()
+
+        for seed, branch in zip([100, 101, 102], branches):
+            replay = Casino.restore(snapshot)
+            replay.rng = random.Random(seed)
+            for _ in range(40):
+                replay.step()
+            assert dict(branch.balance) == dict(replay.balance)
+            assert branch.balance.get_log() == replay.balance.get_log()
+            assert branch.balance.get_log()[:len(log_at_fork)] == log_at_fork
+
+        assert branches[0].balance.get_records()._base is casino.balance.get_records()
+        assert dict(Casino.restore(snapshot).balance) == balances_at_fork
+
+    def test_fork_continues_like_parent(self, sample_geese):
+        """Тестирование совпадения ветки с продолжением исходного казино с тем же сидом"""
+        casino = Casino(rng=random.Random(5))
+        casino.register_players(Player(f"Игрок {i}", 5 + i % 7) for i in range(30))
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        for _ in range(150):
+            casino.step()
+        assert 0 < casino.players.count_with_balance() < 30
+
+        branch, = casino.fork(1, seeds=[9])
+        casino.rng = random.Random(9)
+        expected = [str(casino.step()) for _ in range(150)]
+        assert [str(branch.step()) for _ in range(150)] == expected
+        assert dict(branch.balance) == dict(casino.balance)
+
+    def test_profiling(self, sample_players, sample_geese):
+        """Тестирование профилирования событий"""
+        casino = Casino(rng=random.Random(8))
+        casino.register_players(sample_players)
+        for goose in sample_geese:
+            casino.register_geese(goose)
+        assert casino.stats() == {}
+
+        casino.enable_profiling(trace_alloc=True)
+        casino.step_many(30)
+        for _ in range(30):
+            casino.step()
+        casino.disable_profiling()
+
+        stats = casino.stats()
+        assert sum(s['calls'] for s in stats.values()) == 60
+        for s in stats.values():
+            assert 0 < s['p50_ns'] <= s['p99_ns']
+            assert s['total_ns'] >= s['p99_ns']
+        assert casino._events[0] == casino.players_bet
+
+    def test_profiling_keeps_sequence(self, sample_players, sample_geese):
+        """Тестирование того, что профилирование не меняет ход симуляции"""
+        results = []
+        for profile in (False, True):
+            casino = Casino(rng=random.Random(9))
+            casino.register_players([Player(p.name, p.balance) for p in sample_players])
+            for goose in sample_geese:
+                casino.register_geese(goose)
+            if profile:
+                casino.enable_profiling()
+            results.append([str(casino.step()) for _ in range(40)])
+        assert results[0] == results[1]
+
+    def test_register_event(self, casino):
+        """Тестирование события-плагина"""
+        casino.register_event('lottery', lottery, 1.0, templates={'draw': 'Выпало {amount}'})
+        casino.set_event_weights({name: 0 for name in Casino.EVENT_WEIGHTS})
+
+        results = [casino.step() for _ in range(5)]
+        assert all(str(result).startswith("Выпало ") for result in results)
+        with pytest.raises(ValueError):
+            casino.register_event('lottery', lottery, 1.0)
+        with pytest.raises(ValueError):
+            casino.register_event('dice', lottery, 1.0, requires=('unknown',))
+
+    def test_precondition_skips_event(self, casino, sample_players):
+        """Тестирование пропуска плагина с невыполненными предусловиями"""
+        casino.register_players(sample_players)
+        casino.register_geese(Goose("Обычный", 5))
+        handler = Mock(side_effect=lottery)
+        casino.register_event('raid', handler, 1.0, requires={'war_geese': 'no_war_geese'},
+                              vectorized=lottery_many)
+        casino.set_event_weights({name: 0 for name in Casino.EVENT_WEIGHTS})
+
+        results = [casino.step() for _ in range(5)] + casino.step_many(5)
+        handler.assert_not_called()
+        assert [(r.event, r.outcome) for r in results] == [('raid', 'no_war_geese')] * 10
+
+        casino.register_geese(WarGoose("Боевой", 5))
+        assert casino.step().outcome == 'draw'
+        handler.assert_called_once_with(casino)
+
+    def test_builtin_preconditions_match_requires(self):
+        """Тестирование пустышек встроенных событий: без случайных чисел и с исходом из EVENT_REQUIRES"""
+        casino = Casino(rng=random.Random(1))
+        casino.register_player(Player("Бомж", 0))
+        state = casino.rng.getstate()
+        for name, requires in Casino.EVENT_REQUIRES.items():
+            failed = [outcome for req, outcome in requires.items()
+                      if not Casino.PRECONDITIONS[req](casino)]
+            if failed:
+                assert getattr(casino, name)().outcome == failed[0]
+        assert casino.rng.getstate() == state
+
+    def test_skipped_event_keeps_sequence(self, casino):
+        """Тестирование того, что пустышки не меняют выбор событий"""
+        casino.register_player(Player("Бомж", 0))
+        casino.set_event_weights({'create_chip': 0})
+        names, weights = list(casino.event_weights), list(casino.event_weights.values())
+        expected_rng = random.Random(3)
+        expected = [expected_rng.choices(names, weights, k=1)[0] for _ in range(20)]
+
+        casino.rng = random.Random(3)
+        assert [casino.step().event for _ in range(20)] == expected
+        assert str(StepResult('players_bet', 'no_players')) == "Никто не может сделать ставку"
+
+    def test_plugin_templates_per_casino(self):
+        """Тестирование текстов плагинов с одинаковым именем в разных казино"""
+        texts = []
+        for template in ('Выпало {amount}', 'Кубик показал {amount}'):
+            casino = Casino(rng=random.Random(1))
+            casino.register_event('lottery', lottery, 1.0, templates={'draw': template})
+            casino.set_event_weights({name: 0 for name in Casino.EVENT_WEIGHTS})
+            texts.append(str(casino.step()))
+
+        assert texts == ['Выпало 1', 'Кубик показал 1']
+        assert ('lottery', 'draw') not in StepResult.TEMPLATES
+        skipped = StepResult('raid', 'skipped')
+        assert str(skipped) == 'Событие raid пропущено: не выполнены предусловия'
+
+    def test_step_many_vectorized(self, casino):
+        """Тестирование пакетного варианта события в step_many"""
+        casino.register_event('lottery', lottery, 1.0, vectorized=lottery_many,
+                              templates={'draw': 'Выпало {amount}'})
+        casino.set_event_weights({name: 0 for name in Casino.EVENT_WEIGHTS})
+
+        results = casino.step_many(20)
+        assert len(results) == 20
+        assert casino.step_count == 20
+        assert all(result.event == 'lottery' for result in results)
+
+    def test_plugin_survives_snapshot_and_fork(self, casino, sample_players):
+        """Тестирование сохранения плагинов в снимке и ветках"""
+        casino.register_players(sample_players)
+        casino.register_event('lottery', lottery, 2.0, templates={'draw': 'Выпало {amount}'})
+
+        restored = Casino.restore(casino.snapshot())
+        branch, = casino.fork(1)
+        for other in (restored, branch):
+            assert other.event_weights['lottery'] == 2.0
+            assert other.events['lottery'].handler is lottery
+
+    def test_balance_fork_isolated(self):
+        """Тестирование независимости веток балансов"""
+        balance = CasinoBalance()
+        balance.update_many([("Иван", 100), ("Мария", 50)])
+        left, right = balance.fork(2)
+
+        left["Иван"] = 10
+        del right["Мария"]
+        balance["Мария"] = 70
+
+        assert dict(left) == {"Иван": 10, "Мария": 50}
+        assert dict(right) == {"Иван": 100}
+        assert dict(balance) == {"Иван": 100, "Мария": 70}
+        assert len(left.get_log()) == 3
+        assert repr(right) == "Casino_balance({'Иван': 100})"
+        assert type(balance._balances) is dict
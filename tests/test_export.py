@@ -0,0 +1,87 @@
+import csv
+import random
+import pytest
+from src.export import EventExporter, export_run, read_ndjson, COLUMNS
+from src.simulation import build_casino
+from src.Wanna_play_kazik import StepResult
+
+
+class TestExport:
+    def test_export_ndjson(self, tmp_path):
+        """Тестирование выгрузки в NDJSON"""
+        path = str(tmp_path / "run.ndjson")
+        casino = build_casino(random.Random(1))
+        log_before = len(casino.balance.get_log())
+
+        rows = export_run(casino, 50, path, chunk_size=7)
+
+        records = read_ndjson(path)
+        assert len(records) == rows
+        assert set(records[0]) == set(COLUMNS)
+        assert records[-1]["step"] == 50
+        balance_rows = [r for r in records if r["ledger"] == "balance"]
+        assert len(balance_rows) == len(casino.balance.get_log()) - log_before
+
+    def test_export_csv(self, tmp_path):
+        """Тестирование выгрузки в CSV"""
+        path = str(tmp_path / "run.csv")
+        casino = build_casino(random.Random(2))
+        rows = export_run(casino, 20, path)
+
+        with open(path, encoding="utf-8", newline="") as f:
+            lines = list(csv.reader(f))
+        assert tuple(lines[0]) == COLUMNS
+        assert len(lines) == rows + 1
+
+    def test_export_ring_log(self, tmp_path):
+        """Тестирование выгрузки при кольцевом логе балансов"""
+        from src.Wanna_play_kazik import Casino
+        from src.Players import Player
+        casino = Casino(log_mode='ring', log_capacity=2, rng=random.Random(3))
+        casino.register_player(Player("Иван", 100))
+        path = str(tmp_path / "run.ndjson")
+
+        export_run(casino, 30, path)
+        changes = [r for r in read_ndjson(path) if r["ledger"] == "balance"]
+        assert all(r["key"] == "Иван" for r in changes)
+
+    def test_export_log_off_matches_full(self, tmp_path):
+        """Тестирование полноты выгрузки при выключенном логе балансов"""
+        from src.Wanna_play_kazik import Casino
+        from src.Players import Player
+        exports = []
+        for mode in ('full', 'off'):
+            casino = Casino(log_mode=mode, rng=random.Random(5))
+            casino.register_players([Player("Иван", 100), Player("Мария", 50)])
+            path = str(tmp_path / f"{mode}.ndjson")
+            export_run(casino, 40, path)
+            exports.append(read_ndjson(path))
+            assert casino.balance._listeners == []
+
+        assert exports[0] == exports[1]
+        assert any(r["ledger"] == "balance" for r in exports[1])
+
+    def test_exporter_event_without_changes(self, tmp_path):
+        """Тестирование события без изменений балансов"""
+        path = str(tmp_path / "run.ndjson")
+        with EventExporter(path) as exporter:
+            exporter.write(1, StepResult('create_chip', 'chip', amount=5))
+
+        assert read_ndjson(path) == [{
+            "step": 1, "event": "create_chip", "outcome": "chip", "actor": None, "target": None,
+            "amount": 5, "before": 0, "after": 0, "extra": 0,
+            "ledger": None, "key": None, "old": None, "new": None,
+        }]
+
+    def test_exporter_bad_format(self, tmp_path):
+        """Тестирование неизвестного формата"""
+        with pytest.raises(ValueError):
+            EventExporter(str(tmp_path / "run.txt"))
+
+    def test_export_parquet(self, tmp_path):
+        """Тестирование выгрузки в Parquet"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "run.parquet")
+        rows = export_run(build_casino(random.Random(4)), 30, path, chunk_size=10)
+
+        assert pq.read_table(path).num_rows == rows
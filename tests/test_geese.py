@@ -3,6 +3,7 @@ import random
 from unittest.mock import Mock
 from src.We_need_one_more_goose import Goose, WarGoose, HonkGoose, GooseFlock
 from src.Players import Player
+from src.Wanna_play_kazik import CasinoBalance
 
 
 class TestGoose:
@@ -36,6 +37,12 @@ class TestGoose:
         assert goose2 in flock.geese
 
 
+    def test_goose_slots(self):
+        """Тестирование отсутствия __dict__ у гусей и стаи"""
+        for obj in (Goose("Петр", 5), WarGoose("Геннадий", 5), HonkGoose("Василий", 10), GooseFlock([])):
+            assert not hasattr(obj, "__dict__")
+
+
 class TestWarGoose:
     def test_wargoose_initialization(self):
         """Тестирование создания военного гуся"""
@@ -50,9 +57,10 @@ class TestWarGoose:
         player = Player("Иван", 100)
 
         # Фиксируем случайное число для предсказуемости теста
-        monkeypatch.setattr(random, "randint", lambda x, y: 5)
+        rng = random.Random()
+        monkeypatch.setattr(rng, "randint", lambda x, y: 5)
 
-        result = goose.attack(player)
+        result = goose.attack(player, rng)
         assert player.balance == 95
         assert "Геннадий атакует Иван" in result
         assert "Баланс игрока уменьшен на 5" in result
@@ -62,12 +70,24 @@ class TestWarGoose:
         goose = WarGoose("Геннадий", 5, 20)
         player = Player("Иван", 10)
 
-        monkeypatch.setattr(random, "randint", lambda x, y: 15)
+        rng = random.Random()
+        monkeypatch.setattr(rng, "randint", lambda x, y: 15)
 
-        result = goose.attack(player)
+        result = goose.attack(player, rng)
         assert player.balance == 0
         assert "Баланс игрока уменьшен на 15" in result
 
+    def test_wargoose_hit(self, monkeypatch):
+        """Тестирование атаки без текстового описания"""
+        goose = WarGoose("Геннадий", 5, 10)
+        player = Player("Иван", 100)
+
+        rng = random.Random()
+        monkeypatch.setattr(rng, "randint", lambda x, y: 4)
+
+        assert goose.hit(player, rng) == 4
+        assert player.balance == 96
+
     def test_wargoose_repr(self):
         """Тестирование строкового представления военного гуся"""
         goose = WarGoose("Геннадий", 5, 15)
@@ -93,7 +113,7 @@ class TestHonkGoose:
         mock_casino = Mock()
         mock_casino.players = [player1, player2]
 
-        casino_balance = {}
+        casino_balance = CasinoBalance()
         mock_casino.balance = casino_balance
 
         original_update_balance = None
@@ -101,12 +121,16 @@ class TestHonkGoose:
             original_update_balance = mock_casino.update_balance
             mock_casino.update_balance = Mock()
 
-        monkeypatch.setattr(random, "random", lambda: 0.3)  # 30% < 50% - выигрыш
+        rng = random.Random()
+        monkeypatch.setattr(rng, "getrandbits", lambda n: 0b10)  # выигрывает только первый
 
-        result = goose.super_honk(mock_casino)
+        result = goose.super_honk(mock_casino, rng)
 
         assert "Василий издает особый крик" in result
-        assert "игроков получили" in result
+        assert "1 игроков получили" in result
+        assert player1.balance == 110
+        assert player2.balance == 150
+        assert casino_balance == {"Иван": 110}
 
         # Для отладки - что на самом деле происходит
         print("Тест завершен, проверим реализацию метода super_honk")
@@ -120,14 +144,28 @@ class TestHonkGoose:
         mock_player.name = "Иван"
         mock_player.balance = 100
         mock_casino.players = [mock_player]
-        mock_casino.balance = {}
+        mock_casino.balance = CasinoBalance()
 
-        monkeypatch.setattr(random, "random", lambda: 0.4)
-        result = goose.super_honk(mock_casino)
+        rng = random.Random()
+        monkeypatch.setattr(rng, "getrandbits", lambda n: 0)
+        result = goose.super_honk(mock_casino, rng)
         assert mock_player.balance == 100
         assert "Василий издает особый крик" in result
         assert "0 игроков получили по 10 монет" in result
 
+    def test_honkgoose_payout_distribution(self):
+        """Тестирование того, что каждый игрок выигрывает примерно в половине криков"""
+        goose = HonkGoose("Василий", 10, 1)
+        mock_casino = Mock()
+        mock_casino.players = [Player(f"Игрок{i}", 0) for i in range(10)]
+        mock_casino.balance = CasinoBalance()
+
+        rng = random.Random(5)
+        for _ in range(2000):
+            goose.honk_players(mock_casino, rng)
+
+        assert all(900 < player.balance < 1100 for player in mock_casino.players)
+
     def test_honkgoose_call(self):
         """Тестирование вызова гуся как функции"""
         goose = HonkGoose("Василий", 8, 5)
@@ -1,5 +1,8 @@
 import pytest
-from src.Players import Player, PlayerCollection
+import random
+from src.Players import Player, PlayerCollection, ArrayPlayerCollection
+from src.Wanna_play_kazik import Casino
+from src.We_need_one_more_goose import Goose, WarGoose, HonkGoose
 
 
 class TestPlayer:
@@ -32,6 +35,13 @@ class TestPlayer:
         player.win(50)
         assert player.balance == 150
 
+    def test_player_slots(self):
+        """Тестирование отсутствия __dict__ у игрока"""
+        player = Player("Алексей", 200)
+        assert not hasattr(player, "__dict__")
+        with pytest.raises(AttributeError):
+            player.nickname = "Лёха"
+
     def test_player_repr(self):
         """Тестирование строкового представления"""
         player = Player("Алексей", 200)
@@ -88,6 +98,21 @@ class TestPlayerCollection:
         collection[0] = player2
         assert collection[0] == player2
 
+    def test_collection_setitem_slice(self):
+        """Тестирование замены среза игроков с обновлением индексов"""
+        a, b, c = Player("A", 10), Player("B", 20), Player("C", 0)
+        collection = PlayerCollection([a, b, c])
+
+        collection[0:2] = [Player("X", 5)]
+        assert [p.name for p in collection] == ["X", "C"]
+        assert collection.find_by_name("A") is None
+        assert collection.find_by_name("X").balance == 5
+        assert collection.count_with_balance() == 1
+        a.balance = 0
+        assert collection.count_with_balance() == 1
+        with pytest.raises(ValueError):
+            collection[::2] = [Player("Y", 1)] * 3
+
     def test_collection_delitem(self):
         """Тестирование удаления игрока"""
         player1 = Player("Алексей", 200)
@@ -163,4 +188,255 @@ class TestPlayerCollection:
         player = Player("Алексей", 200)
         collection = PlayerCollection([player])
 
-        assert repr(collection) == f"PlayerCollection([{repr(player)}])"
\ No newline at end of file
+        assert repr(collection) == f"PlayerCollection([{repr(player)}])"
+    def test_find_by_name_after_changes(self):
+        """Тестирование индекса имён после изменения коллекции"""
+        player1 = Player("Алексей", 200)
+        player2 = Player("Мария", 150)
+        player3 = Player("Иван", 100)
+        collection = PlayerCollection([player1])
+
+        collection.insert(0, player2)
+        collection[1] = player3
+        assert collection.find_by_name("Алексей") is None
+        assert collection.find_by_name("Иван") is player3
+
+        del collection[0]
+        assert collection.find_by_name("Мария") is None
+        assert collection[:1].find_by_name("Иван") is player3
+
+    def test_find_by_name_duplicates(self):
+        """Тестирование поиска при одинаковых именах"""
+        first = Player("Иван", 100)
+        second = Player("Иван", 50)
+        collection = PlayerCollection([first, second])
+
+        assert collection.find_by_name("Иван") is first
+        collection.remove(first)
+        assert collection.find_by_name("Иван") is second
+
+    def test_solvent_tracking(self):
+        """Тестирование отслеживания игроков с деньгами при изменении баланса"""
+        rich = Player("Богатый", 100)
+        poor = Player("Бедный", 0)
+        collection = PlayerCollection([rich, poor])
+        assert collection.count_with_balance() == 1
+
+        rich.bet(100)
+        assert collection.count_with_balance() == 0
+        assert collection.random_with_balance(random.Random(0)) is None
+
+        poor.win(10)
+        assert collection.get_players_with_balance() == [poor]
+        assert collection.random_with_balance(random.Random(0)) is poor
+
+    def test_solvent_tracking_removal(self):
+        """Тестирование отслеживания после удаления игрока из коллекции"""
+        player1 = Player("Алексей", 200)
+        player2 = Player("Мария", 150)
+        collection = PlayerCollection([player1, player2])
+
+        del collection[0]
+        player1.balance = 0
+        player1.balance = 50
+        assert collection.get_players_with_balance() == [player2]
+
+        sliced = collection[:]
+        player2.balance = 0
+        assert collection.count_with_balance() == 0
+        assert sliced.count_with_balance() == 0
+
+    @pytest.mark.parametrize("backend", [PlayerCollection, ArrayPlayerCollection])
+    def test_solvent_order(self, backend):
+        """Тестирование переноса порядка случайного выбора в другую коллекцию"""
+        collection = backend([Player(f"Игрок {i}", 10) for i in range(5)])
+        collection[1].balance = 0
+        collection[3].balance = 0
+        collection[1].balance = 10
+        order = collection.solvent_order()
+        assert sorted(order) == [0, 1, 2, 4]
+
+        copy = backend([Player(player.name, player.balance) for player in collection])
+        copy.set_solvent_order(order)
+        assert copy.solvent_order() == order
+        assert collection.fork().solvent_order() == order
+        picks = [collection.random_with_balance(random.Random(seed)).name for seed in range(10)]
+        assert [copy.random_with_balance(random.Random(seed)).name for seed in range(10)] == picks
+
+        with pytest.raises(ValueError):
+            copy.set_solvent_order([0, 1])
+
+    def test_watchers_released_with_slices(self):
+        """Тестирование того, что временные срезы не копят ссылки в игроке"""
+        player = Player("Иван", 10)
+        collection = PlayerCollection([player])
+        for _ in range(1000):
+            collection[:]
+
+        assert len(player._watchers) == 1
+        player.balance = 0
+        assert collection.count_with_balance() == 0
+
+    def test_swap_remove(self):
+        """Тестирование удаления игрока обменом с последним"""
+        players = [Player(f"Игрок {i}", i) for i in range(5)]
+        collection = PlayerCollection(list(players))
+        collection.append(Player("Новый", 10))
+
+        collection.swap_remove(players[1])
+        assert [p.name for p in collection] == ["Игрок 0", "Новый", "Игрок 2", "Игрок 3", "Игрок 4"]
+        assert collection.find_by_name("Игрок 1") is None
+        assert players[1] not in collection
+        assert players[1] not in collection.get_players_with_balance()
+        players[1].balance = 50
+        assert collection.count_with_balance() == 4
+
+        del collection[0]
+        collection.swap_remove(players[4])
+        assert [p.name for p in collection] == ["Новый", "Игрок 2", "Игрок 3"]
+        with pytest.raises(ValueError):
+            collection.swap_remove(players[4])
+
+    def test_swap_remove_duplicate(self):
+        """Тестирование удаления одного из двух вхождений игрока"""
+        player = Player("Иван", 10)
+        collection = PlayerCollection([player, Player("Мария", 5), player])
+
+        collection.swap_remove(player)
+        assert player in collection
+        collection.swap_remove(player)
+        assert player not in collection
+        assert [p.name for p in collection] == ["Мария"]
+
+
+class TestArrayPlayerCollection:
+    def test_views_write_through(self):
+        """Тестирование записи через представления игроков"""
+        collection = ArrayPlayerCollection([Player("Алексей", 200), Player("Мария", 0)])
+
+        player = collection[0]
+        assert isinstance(player, Player)
+        assert player.bet(50) is True
+        assert collection.find_by_name("Алексей").balance == 150
+
+        collection[1].win(10)
+        assert collection.count_with_balance() == 2
+        assert repr(collection[1]) == "Player(name=Мария, balance=10)"
+
+    def test_sequence_operations(self):
+        """Тестирование операций MutableSequence"""
+        collection = ArrayPlayerCollection([Player(f"Player{i}", i) for i in range(5)])
+
+        del collection[1]
+        collection.insert(0, Player("Новый", 7))
+        collection[2] = Player("Замена", 0)
+        assert [p.name for p in collection] == ["Новый", "Player0", "Замена", "Player3", "Player4"]
+        assert collection.find_by_name("Player2") is None
+        assert collection.count_with_balance() == 3
+
+        collection[1:3] = [Player("X", 5)]
+        assert [p.name for p in collection] == ["Новый", "X", "Player3", "Player4"]
+        assert collection.find_by_name("Player0") is None
+        assert collection.find_by_name("X").balance == 5
+        assert collection.count_with_balance() == 4
+        with pytest.raises(ValueError):
+            collection[::2] = [Player("Y", 1)]
+
+        sliced = collection[1:3]
+        assert isinstance(sliced, ArrayPlayerCollection)
+        assert len(sliced) == 2
+
+    def test_bulk_operations(self):
+        """Тестирование массовых операций"""
+        collection = ArrayPlayerCollection([Player(f"Player{i}", i * 10) for i in range(6)])
+
+        assert collection.total_balance() == 150
+        assert [p.name for p in collection.top_k(2)] == ["Player5", "Player4"]
+
+        collection.apply_delta(-20)
+        assert collection.count_with_balance() == 3
+        collection.apply_delta(100, ["Player0"])
+        assert collection.find_by_name("Player0").balance == 80
+
+    def test_bulk_delta_solvent_set(self):
+        """Тестирование множества платёжеспособных после массовых изменений"""
+        collection = ArrayPlayerCollection([Player(f"Player{i}", i * 10 - 20) for i in range(6)])
+        del collection[0]
+        collection.apply_delta(15)
+        assert sorted(p.name for p in collection.get_players_with_balance()) == \
+            ["Player1", "Player2", "Player3", "Player4", "Player5"]
+        assert collection.total_balance() == sum(p.balance for p in collection)
+
+        changes = collection.apply_delta_where(-100, "10100")
+        assert changes == [("Player1", -95), ("Player3", -75)]
+        assert sorted(p.name for p in collection.get_players_with_balance()) == \
+            ["Player2", "Player4", "Player5"]
+
+    def test_super_honk_array_backend(self):
+        """Тестирование особого крика на массивах (совпадает со списком игроков)"""
+        balances = []
+        for players in (PlayerCollection(), ArrayPlayerCollection()):
+            casino = Casino(rng=random.Random(3), players=players)
+            casino.register_players(Player(f"Игрок{i}", i % 3) for i in range(50))
+            goose = HonkGoose("Крикун", 5, 7)
+            for _ in range(5):
+                goose.honk_players(casino, casino.rng)
+            balances.append(([p.balance for p in casino.players], dict(casino.balance),
+                             casino.players.count_with_balance()))
+        assert balances[0] == balances[1]
+
+    def test_fork_independent(self):
+        """Тестирование независимой копии массивов"""
+        collection = ArrayPlayerCollection([Player("Алексей", 200), Player("Мария", 0)])
+        child = collection.fork()
+
+        child[0].balance = 0
+        child.append(Player("Иван", 5))
+        assert collection[0].balance == 200
+        assert len(collection) == 2
+        assert child.count_with_balance() == 1
+
+    def test_branches_copy_on_write(self):
+        """Тестирование веток с общими массивами и слоем балансов"""
+        collection = ArrayPlayerCollection(Player(f"Игрок {i}", i) for i in range(4))
+        left, right = collection.branches(2)
+        assert left._names is collection._names
+
+        left[1].balance = 0
+        right.swap_remove(right.find_by_name("Игрок 2"))
+        collection.apply_delta(10)
+
+        assert [p.balance for p in left] == [0, 0, 2, 3]
+        assert left.count_with_balance() == 2
+        assert [p.name for p in right] == ["Игрок 0", "Игрок 1", "Игрок 3"]
+        assert right.total_balance() == 4
+        assert [p.balance for p in collection] == [10, 11, 12, 13]
+        assert collection.count_with_balance() == 4
+        assert len(collection) == 4
+
+    def test_swap_remove(self):
+        """Тестирование удаления обменом с последним в массивах"""
+        collection = ArrayPlayerCollection(Player(f"Игрок {i}", i) for i in range(4))
+        collection.swap_remove(collection.find_by_name("Игрок 1"))
+
+        assert [p.name for p in collection] == ["Игрок 0", "Игрок 3", "Игрок 2"]
+        assert collection.find_by_name("Игрок 1") is None
+        assert collection.count_with_balance() == 2
+        collection.append(Player("Новый", 7))
+        assert collection.find_by_name("Новый").balance == 7
+        with pytest.raises(ValueError):
+            collection.swap_remove(Player("Игрок 0", 0))
+
+    def test_casino_with_array_backend(self):
+        """Тестирование совпадения симуляции на обоих вариантах коллекции"""
+        def simulate(players):
+            casino = Casino(rng=random.Random(11), players=players)
+            for name, balance in (("Алексей", 200), ("Мария", 150), ("Иван", 100)):
+                casino.register_player(Player(name, balance))
+            for goose in (WarGoose("Боевой", 5, 15), HonkGoose("Крикун", 10, 7), Goose("Петр", 3)):
+                casino.register_geese(goose)
+            for _ in range(300):
+                casino.step()
+            return dict(casino.balance), sorted((p.name, p.balance) for p in casino.players)
+
+        assert simulate(ArrayPlayerCollection()) == simulate(PlayerCollection())
@@ -1,7 +1,9 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import random
 from unittest.mock import Mock, patch, call
-from src.simulation import run_sim
+from src.simulation import run_sim, run_batch, run_sweep, build_casino, SimResult, load_checkpoint
 
 
 class TestSimulation:
@@ -66,7 +68,7 @@ class TestSimulation:
         assert "Статистика" in captured.out
         assert "Игроков с деньгами:" in captured.out
 
-    @patch('random.seed')
+    @patch('src.simulation.random.Random')
     @patch('random.random')
     @patch('random.randint')
     @patch('random.choice')
@@ -111,4 +113,170 @@ class TestSimulation:
         assert "Шаг 1:" in output
         assert "Шаг 2:" in output
         assert "=== Итоги симуляции ===" in output
-        assert "=== Статистика ===" in output
\ No newline at end of file
+        assert "=== Статистика ===" in output
+
+class TestBatch:
+    def test_build_casino(self):
+        """Тестирование создания стандартного казино"""
+        casino = build_casino()
+        assert len(casino.players) == 4
+        assert len(casino.geese) == 4
+        assert casino.balance["Алексей"] == 200
+
+    def test_run_batch_matches_scalar(self):
+        """Тестирование совпадения пакетного прогона с обычным по сиду"""
+        seeds = [1, 2, 3]
+        batch = run_batch(seeds, steps=30)
+
+        assert len(batch) == 3
+        for i, seed in enumerate(seeds):
+            casino = build_casino(random.Random(seed))
+            for _ in range(30):
+                casino.step()
+
+            balances, income = batch.run(i)
+            assert balances == dict(casino.balance)
+            assert income == dict(casino.goose_income)
+
+    def test_run_batch_negative_steps(self):
+        """Тестирование пакетного прогона с отрицательным количеством шагов"""
+        with pytest.raises(ValueError):
+            run_batch([1], steps=-1)
+
+
+class TestSweep:
+    def test_run_sweep_in_process(self):
+        """Тестирование прогона по сидам без пула процессов"""
+        results = run_sweep([5, 6], steps=10, workers=1)
+
+        assert [r.seed for r in results] == [5, 6]
+        assert all(isinstance(r, SimResult) for r in results)
+        assert set(results[0].balances) == {"Алексей", "Мария", "Иван", "Ольга"}
+
+    def test_run_sweep_matches_batch(self):
+        """Тестирование совпадения результатов пула процессов с пакетным прогоном"""
+        seeds = [10, 11, 12, 13]
+        results = run_sweep(seeds, steps=25, workers=2)
+        batch = run_batch(seeds, steps=25)
+
+        assert [r.seed for r in results] == seeds
+        for i, res in enumerate(results):
+            balances, income = batch.run(i)
+            assert res.balances == balances
+            assert res.goose_income == income
+
+    def test_sim_result_richest(self):
+        """Тестирование определения самого богатого игрока и гуся"""
+        casino = build_casino()
+        casino.goose_income["Обычный Петр"] = 5
+
+        res = SimResult.from_casino(casino, None, 0)
+        assert res.richest_player == ("Алексей", 200)
+        assert res.richest_goose == ("Обычный Петр", 5)
+
+
+class TestOutputModes:
+    def test_run_sim_silent(self, capsys):
+        """Тестирование симуляции без вывода"""
+        res = run_sim(steps=5, seed=1, inf=True, output='silent')
+
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert isinstance(res, SimResult)
+        assert res.steps == 5
+
+    def test_run_sim_buffered_matches_stream(self, capsys):
+        """Тестирование буферизованного вывода"""
+        stream_res = run_sim(steps=5, seed=2, inf=True)
+        stream_out = capsys.readouterr().out
+
+        buffered_res = run_sim(steps=5, seed=2, inf=True, output='buffered')
+        buffered_out = capsys.readouterr().out
+
+        assert buffered_out == stream_out
+        assert buffered_res.balances == stream_res.balances
+
+    def test_run_sim_to_file(self, capsys):
+        """Тестирование вывода в файловый объект"""
+        buffer = io.StringIO()
+        run_sim(steps=2, seed=3, output='buffered', file=buffer)
+
+        assert capsys.readouterr().out == ""
+        assert "Шаг 2:" in buffer.getvalue()
+
+    def test_run_sim_profile(self):
+        """Тестирование вывода счётчиков профилирования в статистике"""
+        buffer = io.StringIO()
+        run_sim(steps=30, seed=4, inf=True, file=buffer, profile=True)
+
+        stats = buffer.getvalue().split("=== Статистика ===")[1]
+        assert "вызовов" in stats
+        assert "p99" in stats
+
+    def test_run_sim_profile_without_inf(self):
+        """Тестирование счётчиков профилирования без итоговой статистики"""
+        buffer = io.StringIO()
+        res = run_sim(steps=30, seed=4, file=buffer, profile=True)
+
+        assert "=== Профилирование ===" in buffer.getvalue()
+        assert sum(stats['calls'] for stats in res.stats.values()) == 30
+        silent = run_sim(steps=30, seed=4, output='silent', profile=True)
+        assert silent.stats.keys() == res.stats.keys()
+        assert run_sim(steps=5, seed=4, output='silent').stats == {}
+
+    def test_run_sim_error_respects_output(self, capsys):
+        """Тестирование вывода ошибки симуляции в выбранный режим вывода"""
+        with patch('src.simulation.build_casino', side_effect=RuntimeError("сломалось")):
+            assert run_sim(steps=3, output='silent') is None
+            assert capsys.readouterr().out == ""
+
+            buffer = io.StringIO()
+            run_sim(steps=3, output='buffered', file=buffer)
+            assert capsys.readouterr().out == ""
+            assert "error: сломалось" in buffer.getvalue()
+
+    def test_run_sim_bad_output(self):
+        """Тестирование неизвестного режима вывода"""
+        with pytest.raises(ValueError):
+            run_sim(output='loud')
+
+
+class TestCasinoRng:
+    def test_run_sim_keeps_global_random(self):
+        """Тестирование того, что симуляция не трогает общее состояние random"""
+        random.seed(7)
+        expected = random.random()
+
+        random.seed(7)
+        run_sim(steps=10, seed=1, output='silent')
+        assert random.random() == expected
+
+    def test_threaded_casinos_deterministic(self):
+        """Тестирование параллельных симуляций в потоках"""
+        def simulate(seed):
+            casino = build_casino(random.Random(seed))
+            for _ in range(200):
+                casino.step()
+            return dict(casino.balance), dict(casino.goose_income)
+
+        seeds = list(range(8))
+        sequential = [simulate(seed) for seed in seeds]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            threaded = list(executor.map(simulate, seeds))
+
+        assert threaded == sequential
+
+
+class TestCheckpoint:
+    def test_run_sim_resume(self, tmp_path):
+        """Тестирование продолжения симуляции из файла снимка"""
+        path = str(tmp_path / "casino.ckpt")
+        full = run_sim(steps=40, seed=8, output='silent')
+
+        run_sim(steps=20, seed=8, output='silent', checkpoint_path=path, checkpoint_every=10)
+        assert load_checkpoint(path).step_count == 20
+
+        resumed = run_sim(steps=40, seed=8, output='silent', checkpoint_path=path, checkpoint_every=10)
+        assert resumed.balances == full.balances
+        assert resumed.goose_income == full.goose_income
+        assert load_checkpoint(path).step_count == 40
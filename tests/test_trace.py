@@ -0,0 +1,68 @@
+import random
+import pytest
+from src.simulation import build_casino
+from src.trace import TraceWriter, TraceReader, record_trace
+
+
+class TestTrace:
+    def test_record_and_replay(self, tmp_path):
+        """Тестирование записи трассы и чтения балансов по шагам"""
+        path = str(tmp_path / "run.trace")
+        casino = build_casino(random.Random(5))
+        count = record_trace(casino, 200, path)
+
+        with TraceReader(path) as reader:
+            assert len(reader) == count
+            for name, value in casino.balance.items():
+                if ("balance", name) in reader.keys:
+                    assert reader.at(name, 200) == value
+            for name, value in casino.goose_income.items():
+                curve = reader.curve(name)
+                if curve:
+                    assert curve[-1][1] == value
+                    steps = [step for step, _ in curve]
+                    assert steps == sorted(steps)
+
+    def test_at_between_steps(self, tmp_path):
+        """Тестирование запроса баланса между изменениями"""
+        path = str(tmp_path / "run.trace")
+        with TraceWriter(path, chunk_size=2) as writer:
+            writer.write(1, "balance", "Иван", 100, 90)
+            writer.write(3, "goose_income", "Гусь", 0, 10)
+            writer.write(5, "balance", "Иван", 90, 120)
+
+        with TraceReader(path) as reader:
+            assert reader.at("Иван", 0) is None
+            assert reader.at("Иван", 1) == 90
+            assert reader.at("Иван", 4) == 90
+            assert reader.at("Иван", 100) == 120
+            assert reader.curve("Гусь") == [(3, 10)]
+            assert reader.record(-1) == (5, "balance", "Иван", 90, 120)
+            assert list(reader.column("step")) == [1, 3, 5]
+            assert list(reader.column("new")) == [90, 10, 120]
+            with pytest.raises(KeyError):
+                reader.at("Мария", 1)
+
+    def test_record_with_log_off(self, tmp_path):
+        """Тестирование полноты трассы при выключенном логе балансов"""
+        from src.Wanna_play_kazik import Casino
+        from src.Players import Player
+        traces = []
+        for mode in ('full', 'off'):
+            casino = Casino(log_mode=mode, rng=random.Random(6))
+            casino.register_players([Player("Иван", 100), Player("Мария", 50)])
+            path = str(tmp_path / f"{mode}.trace")
+            count = record_trace(casino, 60, path)
+            with TraceReader(path) as reader:
+                traces.append([reader.record(i) for i in range(count)])
+                assert reader.at("Иван", 60) == casino.balance["Иван"]
+
+        assert traces[0] == traces[1]
+        assert traces[1]
+
+    def test_bad_file(self, tmp_path):
+        """Тестирование открытия файла, который не является трассой"""
+        path = tmp_path / "bad.trace"
+        path.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError):
+            TraceReader(str(path))